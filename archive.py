@@ -0,0 +1,167 @@
+# archive.py - Archivage des requêtes des années universitaires passées
+#
+# Les requêtes traitées (state = TRUE) créées avant le début de l'année
+# universitaire en cours (ACADEMIC_YEAR_START, "MM-JJ") passent de `requests`
+# à `requests_archive` par lots de ARCHIVE_BATCH_SIZE lignes, chaque lot
+# dans sa propre transaction : la table vivante reste petite sans long verrou.
+# Une requête encore en attente reste dans la table vivante (recherche,
+# export) jusqu'à son traitement, quelle que soit sa date.
+# Tâche de fond toutes les ARCHIVE_INTERVAL secondes (0 = désactivée),
+# ou manuellement : python archive.py [--dry-run]
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from cache import my_requests_cache
+from counters import table_counters
+from database import db
+
+ACADEMIC_YEAR_START = os.getenv("ACADEMIC_YEAR_START", "09-01")
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 500))
+ARCHIVE_INTERVAL = float(os.getenv("ARCHIVE_INTERVAL", 6 * 3600))
+# Pause entre deux lots, pour laisser passer le trafic normal
+ARCHIVE_BATCH_PAUSE = float(os.getenv("ARCHIVE_BATCH_PAUSE", 0.2))
+
+ARCHIVED_COLUMNS = (
+    "request_id", "user_id", "all_name", "matricule", "cycle", "level", "nom_code_ue",
+    "note_exam", "note_cc", "note_tp", "note_tpe", "autre", "comment", "just_p",
+    "created_at", "state",
+)
+
+
+def academic_year_start(now=None, month_day=ACADEMIC_YEAR_START):
+    """Début de l'année universitaire contenant `now` (ex. 1er septembre)."""
+    now = now or datetime.now()
+    month, day = (int(part) for part in month_day.split("-"))
+    start = now.replace(month=month, day=day, hour=0, minute=0, second=0, microsecond=0)
+    if start > now:
+        start = start.replace(year=start.year - 1)
+    return start
+
+
+class RequestArchiver:
+    def __init__(self, db, batch_size=ARCHIVE_BATCH_SIZE, interval=ARCHIVE_INTERVAL,
+                 pause=ARCHIVE_BATCH_PAUSE):
+        self.db = db
+        self.batch_size = batch_size
+        self.interval = interval
+        self.pause = pause
+        self._lock = asyncio.Lock()
+        self._task = None
+        self._archived = 0
+        self._last_run = None
+
+    async def pending(self, cutoff):
+        row = await self.db.fetch_one(
+            "SELECT COUNT(*) AS n FROM requests WHERE created_at < %s AND state = TRUE", (cutoff,)
+        )
+        return int(row["n"])
+
+    async def archive_batch(self, cutoff):
+        """
+        Déplace au plus `batch_size` requêtes traitées antérieures à `cutoff` ;
+        retourne le nombre de lignes déplacées (0 : plus rien à archiver).
+        La copie et la suppression portent sur le même prédicat dans une
+        seule transaction : une ligne n'est jamais perdue ni dupliquée.
+        """
+        rows = await self.db.fetch_all(
+            """SELECT request_id, user_id FROM requests
+               WHERE created_at < %s AND state = TRUE
+               ORDER BY created_at, request_id
+               LIMIT %s""",
+            (cutoff, self.batch_size)
+        )
+        if not rows:
+            return 0
+
+        ids = [row["request_id"] for row in rows]
+        in_list = ", ".join(["%s"] * len(ids))
+        columns = ", ".join(ARCHIVED_COLUMNS)
+        copied, deleted = await self.db.execute_transaction([
+            (f"""INSERT INTO requests_archive ({columns})
+                 SELECT {columns} FROM requests
+                 WHERE request_id IN ({in_list}) AND created_at < %s AND state = TRUE""", (*ids, cutoff)),
+            (f"""DELETE FROM requests
+                 WHERE request_id IN ({in_list}) AND created_at < %s AND state = TRUE""", (*ids, cutoff)),
+        ], "archive")
+        if copied != deleted:
+            print(f"⚠️ Archivage : {copied} ligne(s) copiée(s) pour {deleted} supprimée(s)")
+        table_counters.increment("requests", -deleted)
+        for user_id in {row["user_id"] for row in rows}:
+            await my_requests_cache.invalidate(user_id)
+        self._archived += deleted
+        return deleted
+
+    async def run_once(self, cutoff=None):
+        """Archive les requêtes traitées antérieures à `cutoff` (début de l'année en cours par défaut)."""
+        cutoff = cutoff or academic_year_start()
+        moved = 0
+        async with self._lock:
+            while True:
+                count = await self.archive_batch(cutoff)
+                moved += count
+                if count < self.batch_size:
+                    break
+                await asyncio.sleep(self.pause)
+            self._last_run = time.time()
+        if moved:
+            print(f"✅ {moved} requête(s) antérieure(s) au {cutoff:%Y-%m-%d} archivée(s)")
+        return moved
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Archivage des requêtes impossible: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        return {
+            "cutoff": academic_year_start().isoformat(),
+            "running": self._lock.locked(),
+            "archived_since_start": self._archived,
+            "last_run": datetime.fromtimestamp(self._last_run).isoformat() if self._last_run else None,
+            "interval_seconds": self.interval,
+            "batch_size": self.batch_size,
+        }
+
+
+# Instance globale
+request_archiver = RequestArchiver(db)
+
+
+async def _main(dry_run):
+    await db.init_db()
+    try:
+        cutoff = academic_year_start()
+        if dry_run:
+            print(f"ℹ️ {await request_archiver.pending(cutoff)} requête(s) à archiver "
+                  f"(créées avant le {cutoff:%Y-%m-%d})")
+        else:
+            await request_archiver.run_once(cutoff)
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archivage des requêtes des années passées")
+    parser.add_argument("--dry-run", action="store_true", help="compte les requêtes sans les déplacer")
+    asyncio.run(_main(parser.parse_args().dry_run))
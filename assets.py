@@ -0,0 +1,177 @@
+# assets.py - Fichiers statiques empreintés et précompressés
+#
+# Build : python assets.py build
+#   static/styles.css -> static/dist/styles.<hash>.css (+ .gz, + .br si brotli est installé)
+#   static/dist/manifest.json : {"styles.css": "styles.<hash>.css", ...}
+# Les templates appellent {{ static_url('styles.css') }} pour obtenir l'URL empreintée.
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import sys
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:  # optionnel : sans brotli, seules les variantes gzip sont produites
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+DIST_DIRNAME = "dist"
+MANIFEST_NAME = "manifest.json"
+STATIC_URL_PREFIX = "/static"
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".svg", ".html", ".json", ".txt", ".map"}
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+# --------------------------------------------------------
+# Build
+# --------------------------------------------------------
+def build(static_dir=STATIC_DIR):
+    """Copie chaque fichier sous un nom empreinté, écrit ses variantes compressées et le manifeste."""
+    dist_dir = os.path.join(static_dir, DIST_DIRNAME)
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+    os.makedirs(dist_dir)
+
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist_dir]
+        for filename in sorted(files):
+            source = os.path.join(root, filename)
+            relative = os.path.relpath(source, static_dir).replace(os.sep, "/")
+            with open(source, "rb") as f:
+                content = f.read()
+
+            stem, ext = os.path.splitext(relative)
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            hashed = f"{stem}.{digest}{ext}"
+            target = os.path.join(dist_dir, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(content)
+
+            if ext in COMPRESSIBLE_EXTENSIONS:
+                variants = {".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+                if brotli is not None:
+                    variants[".br"] = brotli.compress(content, quality=11)
+                for suffix, compressed in variants.items():
+                    # Inutile de servir une variante plus grosse que l'original
+                    if len(compressed) < len(content):
+                        with open(target + suffix, "wb") as f:
+                            f.write(compressed)
+
+            manifest[relative] = hashed
+
+    with open(os.path.join(dist_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+# --------------------------------------------------------
+# URLs empreintées (helper Jinja)
+# --------------------------------------------------------
+def load_manifest(static_dir=STATIC_DIR):
+    path = os.path.join(static_dir, DIST_DIRNAME, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+_manifest = load_manifest()
+
+
+def static_url(path):
+    """URL empreintée si le build a été fait, sinon l'URL d'origine (développement)."""
+    hashed = _manifest.get(path)
+    if hashed:
+        return f"{STATIC_URL_PREFIX}/{DIST_DIRNAME}/{hashed}"
+    return f"{STATIC_URL_PREFIX}/{path}"
+
+
+# --------------------------------------------------------
+# Service des fichiers
+# --------------------------------------------------------
+def _accepted_encodings(header):
+    accepted = set()
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        params = params.replace(" ", "")
+        if token and params not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(token.lower())
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles qui sert la variante .br / .gz d'un fichier empreinté selon
+    Accept-Encoding, avec `Cache-Control: immutable` (le nom change avec le
+    contenu). Les fichiers hors de dist/ gardent le comportement d'origine.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._variants = {}
+
+    def _variants_for(self, full_path):
+        variants = self._variants.get(full_path)
+        if variants is None:
+            variants = []
+            for encoding, suffix in ENCODINGS:
+                try:
+                    variants.append((encoding, full_path + suffix, os.stat(full_path + suffix)))
+                except OSError:
+                    pass
+            self._variants[full_path] = variants
+        return variants
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        full_path = os.fspath(full_path)
+        relative = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+        if not relative.startswith(DIST_DIRNAME + "/"):
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        request_headers = Headers(scope=scope)
+        accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+        headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+
+        for encoding, variant_path, variant_stat in self._variants_for(full_path):
+            if encoding in accepted:
+                response = FileResponse(
+                    variant_path,
+                    status_code=status_code,
+                    stat_result=variant_stat,
+                    method=scope["method"],
+                    headers=dict(headers, **{"Content-Encoding": encoding}),
+                    media_type=mimetypes.guess_type(full_path)[0] or "text/plain",
+                )
+                break
+        else:
+            response = FileResponse(
+                full_path,
+                status_code=status_code,
+                stat_result=stat_result,
+                method=scope["method"],
+                headers=headers,
+            )
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["build"]:
+        print("Usage : python assets.py build")
+        sys.exit(1)
+    result = build()
+    print(f"✅ {len(result)} fichier(s) statique(s) empreinté(s) dans static/{DIST_DIRNAME}/"
+          + ("" if brotli else " (brotli absent : gzip uniquement)"))
@@ -1,12 +1,67 @@
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 from passlib.context import CryptContext
 
-# Argon2 configuration (le plus sécurisé)
-pwd_context = CryptContext(
-    schemes=["argon2"],
-    deprecated="auto",
-    argon2__memory_cost=65536,   # 64 MB
-    argon2__parallelism=2,
-    argon2__time_cost=3,
+from executors import BoundedExecutor
+from metrics import argon2_duration
+from ratelimit import argon2_gate
+
+# Argon2 configuration (le plus sécurisé) : valeurs par défaut, surchargées par
+# le fichier produit par `python calibrate_argon2.py` puis par l'environnement.
+DEFAULT_ARGON2_PARAMS = {
+    "memory_cost": 65536,   # 64 MB
+    "parallelism": 2,
+    "time_cost": 3,
+}
+ARGON2_PARAMS_FILE = os.getenv(
+    "ARGON2_PARAMS_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "argon2_params.json"),
+)
+
+
+def load_argon2_params(path=ARGON2_PARAMS_FILE):
+    """Paramètres Argon2 effectifs : défauts < fichier calibré < variables d'env."""
+    params = dict(DEFAULT_ARGON2_PARAMS)
+    if path and os.path.exists(path):
+        with open(path) as f:
+            calibrated = json.load(f)
+        params.update({k: int(calibrated[k]) for k in DEFAULT_ARGON2_PARAMS if k in calibrated})
+    for key in DEFAULT_ARGON2_PARAMS:
+        value = os.getenv(f"ARGON2_{key.upper()}")
+        if value:
+            params[key] = int(value)
+    return params
+
+
+def build_context(params):
+    """CryptContext Argon2 ; min/max_rounds font signaler tout time_cost différent."""
+    return CryptContext(
+        schemes=["argon2"],
+        deprecated="auto",
+        argon2__memory_cost=params["memory_cost"],
+        argon2__parallelism=params["parallelism"],
+        argon2__time_cost=params["time_cost"],
+        argon2__min_rounds=params["time_cost"],
+        argon2__max_rounds=params["time_cost"],
+    )
+
+
+ARGON2_PARAMS = load_argon2_params()
+pwd_context = build_context(ARGON2_PARAMS)
+
+# Argon2 tourne dans des processus séparés : pas de GIL, pas d'event loop bloqué
+HASH_EXECUTOR_WORKERS = int(os.getenv("HASH_EXECUTOR_WORKERS", os.cpu_count() or 1))
+HASH_EXECUTOR_MAX_QUEUE = int(os.getenv("HASH_EXECUTOR_MAX_QUEUE", 32))
+
+hash_executor = BoundedExecutor(
+    "argon2",
+    lambda n: ProcessPoolExecutor(max_workers=n, mp_context=multiprocessing.get_context("spawn")),
+    max_workers=HASH_EXECUTOR_WORKERS,
+    max_queue=HASH_EXECUTOR_MAX_QUEUE,
 )
 
 def hash_password(password: str) -> str:
@@ -15,4 +70,26 @@ def hash_password(password: str) -> str:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Vérifie un mot de passe."""
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
+
+def needs_rehash(hashed_password: str) -> bool:
+    """Le hash a-t-il été produit avec d'autres paramètres que ceux en vigueur ?"""
+    return pwd_context.needs_update(hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    """Hash un mot de passe dans le pool de processus Argon2."""
+    async with argon2_gate:
+        start = time.perf_counter()
+        try:
+            return await hash_executor.run(hash_password, password)
+        finally:
+            argon2_duration.observe(time.perf_counter() - start, "hash")
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Vérifie un mot de passe dans le pool de processus Argon2."""
+    async with argon2_gate:
+        start = time.perf_counter()
+        try:
+            return await hash_executor.run(verify_password, plain_password, hashed_password)
+        finally:
+            argon2_duration.observe(time.perf_counter() - start, "verify")
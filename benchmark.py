@@ -0,0 +1,360 @@
+# benchmark.py - Banc de charge de bout en bout (register, login, submit, my-requests)
+#
+# Usage :
+#   python benchmark.py --duration 30 --concurrency 20 --save bench_baseline.json
+#   python benchmark.py --compare bench_baseline.json --max-regression 0.2
+#
+# Par défaut, démarre `uvicorn main:app` sur une base SQLite temporaire
+# (DB_BACKEND=sqlite, cf. database_sqlite.py). --backend mysql / aiomysql
+# garde la configuration MYSQL_* de l'environnement (ex. un conteneur MySQL
+# local) et permet de comparer les deux pilotes ; --url vise un serveur déjà lancé. Nécessite httpx (pip install httpx).
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+DEFAULT_MIX = "register=5,login=15,submit=30,my_requests=50"
+PASSWORD = "Bench-password-123"
+# Réponses de délestage volontaire (file pleine, limite de débit), comptées à part
+SHED_STATUSES = (429, 503)
+
+# Limites de débit relevées : tout le trafic du banc vient de la même IP
+BENCH_ENV = {
+    "LOGIN_IDENTITY_RATE_PER_MIN": "100000",
+    "LOGIN_IDENTITY_BURST": "100000",
+    "LOGIN_IP_RATE_PER_MIN": "1000000",
+    "LOGIN_IP_BURST": "1000000",
+}
+# Argon2 minimal (--cheap-hash) : mesure le reste de la pile sans le coût du hachage
+CHEAP_HASH_ENV = {
+    "ARGON2_MEMORY_COST": "8192",
+    "ARGON2_TIME_COST": "1",
+    "ARGON2_PARALLELISM": "1",
+}
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"❌ Scénario inconnu : {name} (disponibles : {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values, fraction):
+    """Percentile au rang le plus proche sur une liste déjà triée."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+# --------------------------------------------------------
+# Scénarios : chacun retourne "ok", "rejected" (503/429 : délestage) ou "error"
+# --------------------------------------------------------
+class Population:
+    """Comptes créés pendant le banc, avec leur cookie de session."""
+
+    def __init__(self):
+        self.prefix = uuid.uuid4().hex[:5]
+        self.counter = 0
+        self.users = []        # (login, cookie)
+
+    def new_identity(self):
+        self.counter += 1
+        matricule = f"B{self.prefix}{self.counter:06d}"
+        return {
+            "matricule": matricule,
+            "name": "Bench",
+            "last_name": "Utilisateur",
+            "email": f"{matricule.lower()}@bench.local",
+            "phone": f"{random.randrange(10 ** 8, 10 ** 9)}",
+            "password": PASSWORD,
+        }
+
+    def random_user(self):
+        return random.choice(self.users)
+
+
+def outcome(response, ok):
+    if ok:
+        return "ok"
+    return "rejected" if response.status_code in SHED_STATUSES else "error"
+
+
+async def scenario_register(client, population):
+    identity = population.new_identity()
+    response = await client.post("/register", data=identity)
+    if response.status_code == 303:
+        population.users.append((identity["matricule"], None))
+    return outcome(response, response.status_code == 303)
+
+
+async def scenario_login(client, population):
+    login, _ = population.random_user()
+    response = await client.post("/login", data={"login": login, "password": PASSWORD})
+    return outcome(response, response.status_code == 303 and "user_data" in response.cookies)
+
+
+async def _session(client, population):
+    """Cookie d'un utilisateur connecté (connexion à la demande, puis réutilisé) ; None si refusée."""
+    index = random.randrange(len(population.users))
+    login, cookie = population.users[index]
+    if cookie is None:
+        response = await client.post("/login", data={"login": login, "password": PASSWORD})
+        cookie = response.cookies.get("user_data")
+        if cookie is None:
+            return None
+        population.users[index] = (login, cookie)
+    return {"user_data": cookie}
+
+
+async def scenario_submit(client, population):
+    cookies = await _session(client, population)
+    if cookies is None:
+        return "rejected"
+    response = await client.post("/submit-request", cookies=cookies, data={
+        "cycle": random.choice(("Licence", "Master")),
+        "level": str(random.randint(1, 5)),
+        "nom_code_ue": f"INF{random.randint(100, 499)} Algorithmique",
+        "note_exam": "on",
+        "comment": "Requête générée par le banc de charge",
+    })
+    return outcome(response, response.status_code == 303
+                   and response.headers.get("location") == "/my-requests")
+
+
+async def scenario_my_requests(client, population):
+    cookies = await _session(client, population)
+    if cookies is None:
+        return "rejected"
+    response = await client.get("/my-requests", cookies=cookies)
+    return outcome(response, response.status_code == 200)
+
+
+SCENARIOS = {
+    "register": scenario_register,
+    "login": scenario_login,
+    "submit": scenario_submit,
+    "my_requests": scenario_my_requests,
+}
+
+
+# --------------------------------------------------------
+# Serveur sous test
+# --------------------------------------------------------
+def start_server(args):
+    env = dict(os.environ, **BENCH_ENV)
+    if args.cheap_hash:
+        env.update(CHEAP_HASH_ENV)
+    env["DB_BACKEND"] = args.backend
+    if args.backend == "sqlite":
+        env["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.sqlite3")
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+               "--port", str(args.port), "--log-level", "warning", "--no-access-log"]
+    return subprocess.Popen(command, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+async def wait_ready(client, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise SystemExit(f"❌ Le serveur s'est arrêté au démarrage (code {process.returncode})")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise SystemExit("❌ Le serveur n'a pas répondu sur /health à temps")
+
+
+# --------------------------------------------------------
+# Charge
+# --------------------------------------------------------
+async def seed(client, population, count, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            for attempt in range(20):
+                if await scenario_register(client, population) != "rejected":
+                    return
+                await asyncio.sleep(0.1 * (attempt + 1))
+
+    await asyncio.gather(*(one() for _ in range(count)))
+    if not population.users:
+        raise SystemExit("❌ Aucun utilisateur n'a pu être créé : vérifier la base et les limites")
+    print(f"✅ {len(population.users)} utilisateur(s) créé(s)")
+
+
+async def drive(client, population, mix, concurrency, duration, warmup):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    rejected = {name: 0 for name in names}
+    start = time.monotonic()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    async def worker():
+        while True:
+            now = time.monotonic()
+            if now >= stop_at:
+                return
+            name = random.choices(names, weights)[0]
+            began = time.perf_counter()
+            try:
+                result = await SCENARIOS[name](client, population)
+            except httpx.HTTPError:
+                result = "error"
+            elapsed = time.perf_counter() - began
+            if now >= measure_from:
+                samples[name].append(elapsed)
+                if result == "error":
+                    errors[name] += 1
+                elif result == "rejected":
+                    rejected[name] += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, errors, rejected
+
+
+def summarize(samples, errors, rejected, duration):
+    routes = {}
+    for name, values in samples.items():
+        values.sort()
+        routes[name] = {
+            "requests": len(values),
+            "errors": errors[name],
+            "rejected": rejected[name],
+            "rps": round(len(values) / duration, 1),
+            "p50_ms": _ms(percentile(values, 0.50)),
+            "p95_ms": _ms(percentile(values, 0.95)),
+            "p99_ms": _ms(percentile(values, 0.99)),
+        }
+    total = sum(len(v) for v in samples.values())
+    return {
+        "total": {
+            "requests": total,
+            "errors": sum(errors.values()),
+            "rejected": sum(rejected.values()),
+            "rps": round(total / duration, 1),
+        },
+        "routes": routes,
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def print_report(result):
+    print(f"\n{'route':<12} {'req':>7} {'err':>5} {'503/429':>7} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, r in result["routes"].items():
+        print(f"{name:<12} {r['requests']:>7} {r['errors']:>5} {r['rejected']:>7} {r['rps']:>8} "
+              f"{r['p50_ms'] or '-':>8} {r['p95_ms'] or '-':>8} {r['p99_ms'] or '-':>8}")
+    total = result["total"]
+    print(f"{'total':<12} {total['requests']:>7} {total['errors']:>5} {total['rejected']:>7} {total['rps']:>8}")
+
+
+def compare(result, baseline, max_regression):
+    """Liste des régressions : p95 plus lent ou débit plus faible au-delà du seuil."""
+    regressions = []
+    for name, current in result["routes"].items():
+        previous = baseline.get("routes", {}).get(name)
+        if not previous or not current["requests"] or not previous.get("requests"):
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name} : p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+        if previous["rps"] and current["rps"] < previous["rps"] * (1 - max_regression):
+            regressions.append(f"{name} : débit {previous['rps']} -> {current['rps']} req/s")
+    return regressions
+
+
+async def run(args):
+    mix = parse_mix(args.mix)
+    process = None if args.url else start_server(args)
+    base_url = args.url or f"http://127.0.0.1:{args.port}"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+            await wait_ready(client, process)
+            population = Population()
+            print(f"🔄 Création de {args.users} utilisateur(s) sur {base_url}...")
+            await seed(client, population, args.users, args.concurrency)
+            print(f"🔄 Charge : {args.concurrency} client(s), {args.duration:.0f} s "
+                  f"(+{args.warmup:.0f} s de chauffe), mélange {mix}")
+            samples, errors, rejected = await drive(client, population, mix, args.concurrency,
+                                          args.duration, args.warmup)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=15)
+
+    result = summarize(samples, errors, rejected, args.duration)
+    result["config"] = {
+        "mix": mix,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "backend": "external" if args.url else args.backend,
+        "cheap_hash": args.cheap_hash,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc de charge de l'application")
+    parser.add_argument("--url", help="serveur déjà lancé (sinon main:app est démarré localement)")
+    parser.add_argument("--backend", choices=("sqlite", "mysql", "aiomysql"), default="sqlite",
+                        help="base du serveur démarré localement")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="poids des scénarios, ex. " + DEFAULT_MIX)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="durée mesurée (secondes)")
+    parser.add_argument("--warmup", type=float, default=3, help="chauffe non mesurée (secondes)")
+    parser.add_argument("--users", type=int, default=50, help="utilisateurs créés avant la mesure")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--cheap-hash", action="store_true", help="Argon2 minimal sur le serveur démarré")
+    parser.add_argument("--save", help="écrit le résultat (référence) dans ce fichier JSON")
+    parser.add_argument("--compare", help="référence JSON à laquelle comparer le résultat")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="écart toléré avant de signaler une régression (0.2 = 20 %%)")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print_report(result)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"✅ Résultat enregistré dans {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.max_regression)
+        if regressions:
+            print(f"❌ {len(regressions)} régression(s) par rapport à {args.compare} :")
+            for line in regressions:
+                print(f"   - {line}")
+            sys.exit(1)
+        print(f"✅ Aucune régression au-delà de {args.max_regression:.0%} par rapport à {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
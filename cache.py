@@ -0,0 +1,240 @@
+# cache.py - Cache de résultats par utilisateur (TTL + LRU), backend interchangeable
+import os
+import sys
+import time
+import uuid
+from collections import OrderedDict
+
+MY_REQUESTS_CACHE_BACKEND = os.getenv("MY_REQUESTS_CACHE_BACKEND", "memory")
+MY_REQUESTS_CACHE_TTL = float(os.getenv("MY_REQUESTS_CACHE_TTL", 30))
+MY_REQUESTS_CACHE_SIZE = int(os.getenv("MY_REQUESTS_CACHE_SIZE", 5000))
+
+# Identifiants de connexion inconnus ("aucun compte"), TTL court
+UNKNOWN_LOGIN_CACHE_BACKEND = os.getenv("UNKNOWN_LOGIN_CACHE_BACKEND", "memory")
+UNKNOWN_LOGIN_CACHE_TTL = float(os.getenv("UNKNOWN_LOGIN_CACHE_TTL", 30))
+UNKNOWN_LOGIN_CACHE_SIZE = int(os.getenv("UNKNOWN_LOGIN_CACHE_SIZE", 10000))
+
+
+class CacheBackend:
+    """
+    Interface minimale d'un cache clé -> valeur avec expiration.
+
+    Les méthodes sont asynchrones pour qu'un backend partagé entre workers
+    (Redis, memcached...) puisse être branché sans toucher aux routes.
+    """
+
+    async def get(self, key):
+        raise NotImplementedError
+
+    async def set(self, key, value, ttl):
+        raise NotImplementedError
+
+    async def delete(self, key):
+        raise NotImplementedError
+
+    def stats(self):
+        return {}
+
+
+def _approx_size(value, _depth=0):
+    """Taille mémoire approximative (octets) d'une valeur de lignes SQL."""
+    size = sys.getsizeof(value)
+    if _depth > 4:
+        return size
+    if isinstance(value, dict):
+        size += sum(_approx_size(k, _depth + 1) + _approx_size(v, _depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_approx_size(v, _depth + 1) for v in value)
+    return size
+
+
+class MemoryTTLCache(CacheBackend):
+    """Cache en mémoire du processus : expiration par TTL, éviction LRU au-delà de max_size."""
+
+    def __init__(self, max_size=MY_REQUESTS_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()   # clé -> (valeur, expire_le, taille)
+        self._bytes = 0
+        self.evictions = 0
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    async def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    async def set(self, key, value, ttl):
+        if key in self._entries:
+            self._remove(key)
+        size = _approx_size(value)
+        self._entries[key] = (value, time.monotonic() + ttl, size)
+        self._bytes += size
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def delete(self, key):
+        if key in self._entries:
+            self._remove(key)
+
+    def stats(self):
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "max_size": self.max_size,
+            "approx_bytes": self._bytes,
+            "evictions": self.evictions,
+        }
+
+
+BACKENDS = {
+    "memory": MemoryTTLCache,
+}
+
+
+def create_cache_backend(name, **options):
+    try:
+        return BACKENDS[name](**options)
+    except KeyError:
+        raise ValueError(f"Backend de cache inconnu : {name}") from None
+
+
+# --------------------------------------------------------
+# Cache de /my-requests : une entrée par utilisateur, une page par curseur
+# --------------------------------------------------------
+class UserPageCache:
+    """
+    Pages d'un résultat par utilisateur, regroupées sous une seule clé pour
+    qu'une invalidation efface toutes les pages de l'utilisateur.
+    Le taux de succès est mesuré ici, au niveau des pages demandées.
+
+    Chaque invalidation change la génération de l'utilisateur : une page lue
+    en base avant une invalidation (génération relevée avant la lecture) ne
+    peut plus être stockée après elle.
+    """
+
+    def __init__(self, backend, prefix, ttl):
+        self.backend = backend
+        self.prefix = prefix
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.stale_writes = 0
+
+    def _key(self, user_id):
+        return f"{self.prefix}:{user_id}"
+
+    def _generation_key(self, user_id):
+        return f"{self.prefix}:generation:{user_id}"
+
+    async def generation(self, user_id):
+        """Génération courante, à relever avant de lire la base (cf. set_page)."""
+        key = self._generation_key(user_id)
+        generation = await self.backend.get(key)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            await self.backend.set(key, generation, self.ttl * 10)
+        return generation
+
+    async def get_page(self, user_id, cursor):
+        pages = await self.backend.get(self._key(user_id))
+        page = pages.get(cursor or "") if pages else None
+        if page is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return page
+
+    async def set_page(self, user_id, cursor, page, generation):
+        """Stocke `page`, sauf si l'utilisateur a été invalidé depuis `generation`."""
+        # Génération évincée ou expirée : on ne sait plus, on ne stocke pas
+        if await self.backend.get(self._generation_key(user_id)) != generation:
+            self.stale_writes += 1
+            return
+        key = self._key(user_id)
+        pages = await self.backend.get(key) or {}
+        pages[cursor or ""] = page
+        await self.backend.set(key, pages, self.ttl)
+
+    async def invalidate(self, user_id):
+        """À appeler par tout chemin qui crée ou modifie une requête de l'utilisateur."""
+        await self.backend.set(self._generation_key(user_id), uuid.uuid4().hex, self.ttl * 10)
+        await self.backend.delete(self._key(user_id))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return dict(
+            self.backend.stats(),
+            ttl=self.ttl,
+            hits=self.hits,
+            misses=self.misses,
+            stale_writes=self.stale_writes,
+            hit_rate=round(self.hits / lookups, 3) if lookups else None,
+        )
+
+
+my_requests_cache = UserPageCache(
+    create_cache_backend(MY_REQUESTS_CACHE_BACKEND), "my-requests", MY_REQUESTS_CACHE_TTL
+)
+
+
+# --------------------------------------------------------
+# Résultats négatifs de /login : identifiants sans compte
+# --------------------------------------------------------
+class NegativeLookupCache:
+    """
+    Mémorise pendant `ttl` secondes qu'une recherche (colonne, valeur) n'a
+    trouvé aucune ligne, pour qu'un flot d'identifiants inconnus (credential
+    stuffing) n'atteigne pas MySQL. Les valeurs sont comparées en minuscules,
+    comme le fait la collation insensible à la casse des colonnes.
+
+    Toute création de ligne doit appeler `invalidate` ; entre instances,
+    l'écart est borné par le TTL.
+    """
+
+    def __init__(self, backend, prefix, ttl):
+        self.backend = backend
+        self.prefix = prefix
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, column, value):
+        return f"{self.prefix}:{column}:{value.lower()}"
+
+    async def is_missing(self, column, value):
+        missing = await self.backend.get(self._key(column, value)) is not None
+        if missing:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return missing
+
+    async def remember_missing(self, column, value):
+        await self.backend.set(self._key(column, value), True, self.ttl)
+
+    async def invalidate(self, column, value):
+        await self.backend.delete(self._key(column, value))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return dict(
+            self.backend.stats(),
+            ttl=self.ttl,
+            hits=self.hits,
+            misses=self.misses,
+            hit_rate=round(self.hits / lookups, 3) if lookups else None,
+        )
+
+
+unknown_login_cache = NegativeLookupCache(
+    create_cache_backend(UNKNOWN_LOGIN_CACHE_BACKEND, max_size=UNKNOWN_LOGIN_CACHE_SIZE),
+    "unknown-login", UNKNOWN_LOGIN_CACHE_TTL
+)
@@ -0,0 +1,80 @@
+# calibrate_argon2.py - Choisit les paramètres Argon2 adaptés à la machine courante
+#
+# Usage : python calibrate_argon2.py --target-ms 250 --max-memory-mb 64
+# Écrit argon2_params.json (lu par auth.py au démarrage). Les utilisateurs sont
+# migrés progressivement : leur hash est recalculé à la prochaine connexion.
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from auth import ARGON2_PARAMS_FILE, build_context
+
+
+def measure_verify_ms(params, samples):
+    """Durée médiane (ms) d'une vérification avec ces paramètres."""
+    context = build_context(params)
+    hashed = context.hash("calibration-password")
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.verify("calibration-password", hashed)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms, max_memory_kib, parallelism, samples, min_memory_kib=8192):
+    """
+    Mémoire la plus haute possible (plafond `max_memory_kib`), puis time_cost
+    augmenté tant que la vérification reste sous `target_ms`. Si même
+    time_cost=1 dépasse la cible, la mémoire est divisée par deux ; au
+    plancher `min_memory_kib`, le résultat peut rester au-dessus de la cible
+    (durée mesurée retournée, à contrôler par l'appelant).
+    """
+    memory = max_memory_kib
+    while True:
+        params = {"memory_cost": memory, "parallelism": parallelism, "time_cost": 1}
+        elapsed = measure_verify_ms(params, samples)
+        print(f"  m={memory // 1024} MB t=1 p={parallelism} -> {elapsed:.1f} ms")
+        if elapsed <= target_ms or memory // 2 < min_memory_kib:
+            break
+        memory //= 2
+
+    best = params, elapsed
+    if elapsed > target_ms:
+        return best
+    while True:
+        candidate = dict(best[0], time_cost=best[0]["time_cost"] + 1)
+        elapsed = measure_verify_ms(candidate, samples)
+        print(f"  m={memory // 1024} MB t={candidate['time_cost']} p={parallelism} -> {elapsed:.1f} ms")
+        if elapsed > target_ms:
+            return best
+        best = candidate, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibration des paramètres Argon2")
+    parser.add_argument("--target-ms", type=float, default=250, help="durée cible d'une vérification")
+    parser.add_argument("--max-memory-mb", type=int, default=64, help="mémoire maximale par hash")
+    parser.add_argument("--parallelism", type=int, default=min(2, os.cpu_count() or 1))
+    parser.add_argument("--samples", type=int, default=3)
+    parser.add_argument("--output", default=ARGON2_PARAMS_FILE)
+    args = parser.parse_args()
+
+    print(f"🔄 Calibration Argon2 (cible {args.target_ms:.0f} ms, plafond {args.max_memory_mb} MB)...")
+    params, elapsed = calibrate(args.target_ms, args.max_memory_mb * 1024, args.parallelism, args.samples)
+    if elapsed > args.target_ms:
+        print(f"❌ Même au plancher mémoire, {params} prend {elapsed:.1f} ms "
+              f"(cible {args.target_ms:.0f} ms) : rien n'est écrit. Réduire --parallelism "
+              f"ou relever --target-ms.")
+        sys.exit(1)
+
+    with open(args.output, "w") as f:
+        json.dump(dict(params, measured_ms=round(elapsed, 1)), f, indent=2)
+    print(f"✅ Paramètres retenus : {params} ({elapsed:.1f} ms) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
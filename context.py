@@ -0,0 +1,86 @@
+# context.py - Contexte de la requête HTTP en cours, accessible hors des routes
+import os
+import time
+from contextvars import ContextVar
+
+from starlette.requests import cookie_parser
+
+# Read-your-writes : après une écriture, les lectures de la même session
+# restent sur le primaire pendant cette durée (à régler au-dessus du retard
+# de réplication habituel)
+DB_READ_YOUR_WRITES_WINDOW = float(os.getenv("DB_READ_YOUR_WRITES_WINDOW", 5))
+DB_PIN_COOKIE = "db_pin"
+
+_request_scope = ContextVar("request_scope", default=None)
+
+
+class RequestContextMiddleware:
+    """
+    Publie le scope ASGI de la requête en cours (route, chemin) via une ContextVar.
+
+    Gère aussi l'épinglage au primaire : le cookie `db_pin` (échéance, en
+    secondes epoch) est lu à l'entrée et reposé sur la réponse si la requête
+    a écrit en base, pour que la redirection qui suit lise ses propres écritures.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        scope["db_pin_until"] = _pin_from_cookie(scope)
+
+        async def _send(message):
+            if message["type"] == "http.response.start" and scope.get("db_pin_set"):
+                message = dict(message, headers=list(message.get("headers", [])) + [_pin_cookie(scope)])
+            await send(message)
+
+        token = _request_scope.set(scope)
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            _request_scope.reset(token)
+
+
+def _pin_from_cookie(scope):
+    for name, value in scope.get("headers", ()):
+        if name == b"cookie":
+            raw = cookie_parser(value.decode("latin-1")).get(DB_PIN_COOKIE)
+            try:
+                until = float(raw)
+            except (TypeError, ValueError):
+                return 0.0
+            # Échéance trop lointaine : cookie forgé, ignoré
+            return until if until <= time.time() + DB_READ_YOUR_WRITES_WINDOW + 1 else 0.0
+    return 0.0
+
+
+def _pin_cookie(scope):
+    cookie = (f"{DB_PIN_COOKIE}={int(scope['db_pin_until']) + 1}; Max-Age={int(DB_READ_YOUR_WRITES_WINDOW) + 1}; "
+              "Path=/; HttpOnly; SameSite=Lax")
+    return b"set-cookie", cookie.encode("latin-1")
+
+
+def current_route():
+    """Route (gabarit de chemin) de la requête en cours, ou None hors requête HTTP."""
+    scope = _request_scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path")
+
+
+def pin_primary():
+    """Après une écriture : les lectures de cette session iront au primaire pendant la fenêtre."""
+    scope = _request_scope.get()
+    if scope is not None and DB_READ_YOUR_WRITES_WINDOW > 0:
+        scope["db_pin_until"] = time.time() + DB_READ_YOUR_WRITES_WINDOW
+        scope["db_pin_set"] = True
+
+
+def primary_pinned():
+    """True si la requête en cours doit lire sur le primaire (écriture récente de la session)."""
+    scope = _request_scope.get()
+    return scope is not None and scope.get("db_pin_until", 0.0) > time.time()
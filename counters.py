@@ -0,0 +1,91 @@
+# counters.py - Compteurs de lignes en mémoire pour /db-status et /test-db
+import asyncio
+import os
+import time
+
+from database import db
+
+# Âge maximal des compteurs servis ; au-delà, recomptage synchrone
+COUNTERS_MAX_STALENESS = float(os.getenv("COUNTERS_MAX_STALENESS", 300))
+# Période de la réconciliation en tâche de fond (COUNT(*) réel)
+COUNTERS_RECONCILE_INTERVAL = float(os.getenv("COUNTERS_RECONCILE_INTERVAL", 60))
+
+
+class TableCounters:
+    """
+    Nombre de lignes par table, tenu à jour par les écritures de l'application
+    (`increment`) et recalé périodiquement sur un vrai COUNT(*).
+
+    Les incréments qui tombent pendant un recomptage peuvent être perdus ou
+    comptés deux fois ; l'écart disparaît au recomptage suivant.
+    """
+
+    def __init__(self, db, tables=("users", "requests"),
+                 max_staleness=COUNTERS_MAX_STALENESS,
+                 reconcile_interval=COUNTERS_RECONCILE_INTERVAL):
+        self.db = db
+        self.tables = tables
+        self.max_staleness = max_staleness
+        self.reconcile_interval = reconcile_interval
+        self._counts = {}
+        self._reconciled_at = None
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    def increment(self, table, n=1):
+        if table in self._counts:
+            self._counts[table] += n
+
+    def age(self):
+        if self._reconciled_at is None:
+            return None
+        return time.monotonic() - self._reconciled_at
+
+    async def reconcile(self):
+        """Recompte toutes les tables en une seule requête."""
+        async with self._lock:
+            subqueries = ", ".join(
+                f"(SELECT COUNT(*) FROM {table}) AS {table}" for table in self.tables
+            )
+            row = await self.db.fetch_one(f"SELECT {subqueries}")
+            self._counts = {table: int(row[table]) for table in self.tables}
+            self._reconciled_at = time.monotonic()
+
+    async def get(self):
+        """Compteurs en mémoire, recomptés d'abord s'ils sont trop vieux."""
+        age = self.age()
+        if age is None or age > self.max_staleness:
+            if self._lock.locked():
+                # Un recomptage est déjà en cours : on attend son résultat
+                async with self._lock:
+                    pass
+            else:
+                await self.reconcile()
+        return dict(self._counts)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await self.reconcile()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Recomptage des tables impossible: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Instance globale
+table_counters = TableCounters(db)
@@ -1,9 +1,20 @@
 # database.py - Version MySQL AlwaysData avec PyMySQL
 import os
-import pymysql
 import asyncio
+import importlib
+import time
+import pymysql
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+from executors import BoundedExecutor, ServiceOverloaded
+from context import current_route, pin_primary, primary_pinned
+from metrics import db_query_duration, db_query_errors, normalize_sql, shorten_shape, sql_shape
+from slowlog import slow_query_log
+from migrate import migrate
+from pool import ConnectionPool, PoolTimeout
+from derived_tables import register_insert_hooks
+
 load_dotenv()
 
 # Valeurs récupérées depuis Render ENV VARS
@@ -13,135 +24,628 @@ MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD")
 MYSQL_DB = os.getenv("MYSQL_DB")
 MYSQL_PORT = int(os.getenv("MYSQL_PORT", 3306))
 
+# Réplicas en lecture (optionnel) : "hote1,hote2:3307" ; mêmes identifiants que le primaire
+MYSQL_REPLICA_HOSTS = os.getenv("MYSQL_REPLICA_HOSTS", "")
+# Durée d'éviction d'un réplica après une erreur de connexion
+MYSQL_REPLICA_COOLDOWN = float(os.getenv("MYSQL_REPLICA_COOLDOWN", 30))
+
+# Pool de connexions (à dimensionner selon max_connections côté MySQL)
+MYSQL_POOL_MIN_SIZE = int(os.getenv("MYSQL_POOL_MIN_SIZE", 1))
+MYSQL_POOL_MAX_SIZE = int(os.getenv("MYSQL_POOL_MAX_SIZE", 10))
+MYSQL_POOL_TIMEOUT = float(os.getenv("MYSQL_POOL_TIMEOUT", 10))
+MYSQL_POOL_RECYCLE = float(os.getenv("MYSQL_POOL_RECYCLE", 1800))
+MYSQL_POOL_PING_INTERVAL = float(os.getenv("MYSQL_POOL_PING_INTERVAL", 5))
+
+# Requêtes en attente d'un thread DB au-delà desquelles on répond 503
+DB_EXECUTOR_MAX_QUEUE = int(os.getenv("DB_EXECUTOR_MAX_QUEUE", 100))
+
+# Lignes lues par aller-retour lors d'un streaming (curseur côté serveur)
+DB_STREAM_BATCH_SIZE = int(os.getenv("DB_STREAM_BATCH_SIZE", 500))
+
+# Group commit (opt-in) : INSERT concurrents regroupés en un seul commit
+DB_GROUP_COMMIT = os.getenv("DB_GROUP_COMMIT", "0") == "1"
+DB_GROUP_COMMIT_MAX_DELAY_MS = float(os.getenv("DB_GROUP_COMMIT_MAX_DELAY_MS", 5))
+DB_GROUP_COMMIT_MAX_ROWS = int(os.getenv("DB_GROUP_COMMIT_MAX_ROWS", 100))
+DB_GROUP_COMMIT_MAX_PENDING = int(os.getenv("DB_GROUP_COMMIT_MAX_PENDING", 1000))
+DB_GROUP_COMMIT_MAX_WAIT = float(os.getenv("DB_GROUP_COMMIT_MAX_WAIT", 5))
+
+# Backend de stockage : mysql (défaut), aiomysql ou sqlite (cf. create_database)
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql")
+
 # Debugging - À ajouter temporairement pour vérification
 print("=== CONFIGURATION DATABASE ===")
 print(f"MYSQL_HOST: {MYSQL_HOST}")
 print(f"MYSQL_USER: {MYSQL_USER}")
 print(f"MYSQL_DB: {MYSQL_DB}")
 print(f"MYSQL_PORT: {MYSQL_PORT}")
+print(f"MYSQL_POOL: {MYSQL_POOL_MIN_SIZE}-{MYSQL_POOL_MAX_SIZE}")
+print(f"MYSQL_REPLICA_HOSTS: {MYSQL_REPLICA_HOSTS or '-'}")
+print(f"DB_GROUP_COMMIT: {DB_GROUP_COMMIT}")
+print(f"DB_BACKEND: {DB_BACKEND}")
 print("==============================")
 
+def _parse_hosts(value):
+    """"hote1,hote2:3307" -> [("hote1", 3306), ("hote2", 3307)]"""
+    hosts = []
+    for item in value.split(","):
+        host, _, port = item.strip().partition(":")
+        if host:
+            hosts.append((host, int(port or MYSQL_PORT)))
+    return hosts
+
+
+REPLICAS = _parse_hosts(MYSQL_REPLICA_HOSTS)
+
+# Erreurs après lesquelles une lecture sur réplica est rejouée sur le primaire
+REPLICA_ERRORS = (PoolTimeout, pymysql.err.OperationalError, pymysql.err.InterfaceError)
+
+
+def _connect(host=MYSQL_HOST, port=MYSQL_PORT):
+    # autocommit : une connexion rendue au pool ne doit pas garder un snapshot
+    # de lecture ouvert ; les écritures multi-requêtes appellent begin().
+    return pymysql.connect(
+        host=host,
+        user=MYSQL_USER,
+        password=MYSQL_PASSWORD,
+        database=MYSQL_DB,
+        port=port,
+        charset="utf8mb4",
+        cursorclass=pymysql.cursors.DictCursor,
+        autocommit=True
+    )
+
+
+def _insert_statement(table, columns, rows):
+    """Requête INSERT multi-lignes et paramètres aplatis pour `rows`."""
+    placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    query = (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+        + ", ".join([placeholders] * len(rows))
+    )
+    return query, [value for row in rows for value in row]
+
+
+def _auto_increment_step(conn, cur):
+    """
+    auto_increment_increment de la session, lu une fois par connexion puis
+    gardé sur la connexion : plus d'aller-retour par lot.
+    """
+    step = getattr(conn, "_auto_increment_step", None)
+    if step is None:
+        cur.execute("SELECT @@auto_increment_increment AS step")
+        step = conn._auto_increment_step = cur.fetchone()["step"]
+    return step
+
+
+def _insert_rows(conn, table, columns, rows, derived=None):
+    """
+    INSERT multi-lignes dans une transaction ; retourne l'id de chaque ligne.
+
+    Pour un INSERT ... VALUES à nombre de lignes connu (« simple insert »),
+    InnoDB réserve des auto-incréments consécutifs quel que soit
+    innodb_autoinc_lock_mode : lastrowid est le premier id, les suivants
+    sont espacés de auto_increment_increment.
+
+    `derived(ids)` fournit les requêtes dérivées (cf. Database.on_insert),
+    exécutées avant le commit.
+    """
+    query, params = _insert_statement(table, columns, rows)
+
+    conn.begin()
+    with conn.cursor() as cur:
+        cur.execute(query, params)
+        first_id = cur.lastrowid
+        step = _auto_increment_step(conn, cur) if len(rows) > 1 else 1
+        ids = [first_id + i * step for i in range(len(rows))]
+        for derived_query, derived_params in (derived(ids) if derived else ()):
+            cur.execute(derived_query, derived_params)
+    conn.commit()
+    return ids
+
+
+def _insert_label(table, columns):
+    """Étiquette de métrique commune à tous les INSERT multi-lignes d'une table."""
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES (...)"
+
+
+def _transaction_label(statements):
+    """Étiquette de métrique d'une transaction : ses requêtes, dans l'ordre."""
+    return " ; ".join(query for query, _ in statements)
+
+
+class InsertCoalescer:
+    """
+    Group commit pour une table : les INSERT arrivés pendant `max_delay`
+    secondes (ou jusqu'à `max_rows` lignes) partent en un seul INSERT
+    multi-lignes et un seul commit ; chaque appelant reçoit son propre id.
+
+    Au plus `max_pending` lignes sont en attente ou en cours d'écriture ;
+    au-delà, les appelants attendent une place au plus `max_wait` secondes,
+    puis reçoivent ServiceOverloaded (503).
+    """
+
+    def __init__(self, db, table, columns, max_delay, max_rows, max_pending, max_wait):
+        self.db = db
+        self.table = table
+        self.columns = columns
+        self.max_delay = max_delay
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        self._slots = asyncio.Semaphore(max_pending)
+        self._buffer = []          # (valeurs, future)
+        self._timer = None
+        self._flushes = set()
+        self._batches = 0
+        self._rows = 0
+        self._retries = 0
+        self._retried_rows = 0
+
+    async def insert(self, values):
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.max_wait)
+        except asyncio.TimeoutError:
+            raise ServiceOverloaded(f"File d'écriture {self.table} saturée, réessayez plus tard")
+
+        future = asyncio.get_running_loop().create_future()
+        self._buffer.append((values, future))
+        if len(self._buffer) >= self.max_rows:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        task = asyncio.create_task(self._write(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _write(self, batch):
+        try:
+            ids = await self.db._write_rows(
+                self.table, self.columns, [v for v, _ in batch], "insert_group_commit"
+            )
+            self._batches += 1
+            self._rows += len(batch)
+            for (_, future), row_id in zip(batch, ids):
+                if not future.done():
+                    future.set_result(row_id)
+        except Exception as e:
+            if len(batch) > 1 and self.db._row_error(e):
+                # Une ligne fautive (doublon, interblocage) ne doit pas faire
+                # échouer tout le lot : on réessaie ligne par ligne
+                await self._write_one_by_one(batch)
+                return
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            for _ in batch:
+                self._slots.release()
+
+    async def _write_one_by_one(self, batch):
+        self._retries += 1
+        for values, future in batch:
+            try:
+                row_id = (await self.db._write_rows(
+                    self.table, self.columns, [values], "insert_group_commit_retry"
+                ))[0]
+                self._retried_rows += 1
+                if not future.done():
+                    future.set_result(row_id)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def drain(self):
+        """Écrit immédiatement le tampon et attend toutes les écritures en cours."""
+        self._flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def stats(self):
+        return {
+            "buffered": len(self._buffer),
+            "flushing": len(self._flushes),
+            "batches": self._batches,
+            "rows": self._rows,
+            "batches_retried_row_by_row": self._retries,
+            "rows_written_on_retry": self._retried_rows,
+            "avg_batch_size": round(self._rows / self._batches, 2) if self._batches else None,
+        }
+
+
 class Database:
     def __init__(self):
-        self.conn = None
+        self.pool = None
+        # Réplicas : (hôte, port) et pools associés, créés par connect()
+        self.replicas = list(REPLICAS)
+        self.replica_pools = []
+        self._replica_down_until = [0.0] * len(self.replicas)
+        self._replica_next = 0
+        self._replica_reads = 0
+        self._replica_fallbacks = 0
+        # Un thread par connexion possible : aucun thread n'attend le pool
+        self.executor = BoundedExecutor(
+            "db",
+            lambda n: ThreadPoolExecutor(max_workers=n, thread_name_prefix="db"),
+            max_workers=MYSQL_POOL_MAX_SIZE * (1 + len(self.replicas)),
+            max_queue=DB_EXECUTOR_MAX_QUEUE,
+        )
+        self.group_commit = DB_GROUP_COMMIT
+        self._coalescers = {}
+        self._insert_hooks = {}
+        self._background = set()
 
     async def connect(self):
-        """Établit la connexion MySQL (thread-safe)."""
-        if self.conn and self.conn.open:
-            return self.conn
-
-        def _connect():
-            return pymysql.connect(
-                host=MYSQL_HOST,
-                user=MYSQL_USER,
-                password=MYSQL_PASSWORD,
-                database=MYSQL_DB,
-                port=MYSQL_PORT,
-                charset="utf8mb4",
-                cursorclass=pymysql.cursors.DictCursor,
-                autocommit=False
-            )
+        """Crée le pool de connexions MySQL et ouvre les connexions minimales."""
+        if self.pool is not None and not self.pool.closed:
+            return self.pool
 
-        self.conn = await asyncio.to_thread(_connect)
-        print("✅ Connexion MySQL établie !")
-        return self.conn
+        self.pool = ConnectionPool(
+            _connect,
+            min_size=MYSQL_POOL_MIN_SIZE,
+            max_size=MYSQL_POOL_MAX_SIZE,
+            timeout=MYSQL_POOL_TIMEOUT,
+            recycle=MYSQL_POOL_RECYCLE,
+            ping_interval=MYSQL_POOL_PING_INTERVAL,
+        )
+        # Connexions aux réplicas ouvertes à la demande : un réplica
+        # indisponible ne bloque pas le démarrage
+        self.replica_pools = [
+            ConnectionPool(
+                lambda host=host, port=port: _connect(host, port),
+                min_size=0,
+                max_size=MYSQL_POOL_MAX_SIZE,
+                timeout=MYSQL_POOL_TIMEOUT,
+                recycle=MYSQL_POOL_RECYCLE,
+                ping_interval=MYSQL_POOL_PING_INTERVAL,
+            )
+            for host, port in self.replicas
+        ]
+        pool = self.pool
+        await self.executor.run(pool.fill)
+        print(f"✅ Pool MySQL prêt ({pool.stats()['size']} connexion(s) ouverte(s), "
+              f"{len(self.replica_pools)} réplica(s)) !")
+        return pool
 
     async def close(self):
-        """Ferme la connexion (nécessaire pour le lifespan)."""
-        if self.conn and self.conn.open:
-            def _close():
-                self.conn.close()
-            await asyncio.to_thread(_close)
-            self.conn = None
-            print("✅ Connexion MySQL fermée !")
+        """Draine et ferme le pool (nécessaire pour le lifespan)."""
+        await self.flush_pending_inserts()
+        if self.pool is not None and not self.pool.closed:
+            for replica_pool in self.replica_pools:
+                await self.executor.run(replica_pool.close)
+            await self.executor.run(self.pool.close)
+            print("✅ Pool MySQL fermé !")
+            self.executor.shutdown()
         else:
             print("ℹ️ Aucune connexion à fermer")
 
-    async def init_db(self):
-        """Créer les tables si elles n'existent pas (idempotent)."""
+    async def _run(self, fn, operation=None, query=None, params=None, pool=None):
+        """
+        Exécute `fn(conn)` dans l'executor DB avec une connexion empruntée au
+        pool (`pool`, ou celui du primaire). Si `operation` est fourni, la
+        durée de `fn` (hors attente du pool) est mesurée sous la forme
+        normalisée de `query`, et les exécutions au-delà de DB_SLOW_QUERY_MS
+        vont au journal des requêtes lentes.
+        """
+        primary = await self.connect()
+        pool = pool or primary
+        loop = asyncio.get_running_loop()
+        route = current_route()
+
+        def _call():
+            with pool.connection() as conn:
+                if operation is None:
+                    return fn(conn)
+                start = time.perf_counter()
+                failed = False
+                try:
+                    return fn(conn)
+                except Exception:
+                    failed = True
+                    raise
+                finally:
+                    self._record_query(loop, route, operation, query, params,
+                                       time.perf_counter() - start, failed)
+
+        return await self.executor.run(_call)
+
+    # ----------------------------------------------------
+    # Réplicas : lectures réparties, read-your-writes
+    # ----------------------------------------------------
+    def _pick_replica(self):
+        """
+        Index du prochain réplica disponible (tourniquet), ou None si la
+        lecture doit aller au primaire : pas de réplica, session épinglée
+        après une écriture récente (cf. context.pin_primary), ou réplicas
+        tous écartés après une erreur.
+        """
+        if not self.replica_pools or primary_pinned():
+            return None
+        now = time.monotonic()
+        for _ in range(len(self.replica_pools)):
+            index = self._replica_next % len(self.replica_pools)
+            self._replica_next += 1
+            if self._replica_down_until[index] <= now:
+                return index
+        return None
+
+    async def _read(self, call):
+        """`await call(pool)` sur un réplica si possible ; rejoué sur le primaire (pool=None) en cas d'échec."""
+        index = self._pick_replica()
+        if index is not None:
+            try:
+                result = await call(self.replica_pools[index])
+                self._replica_reads += 1
+                return result
+            except REPLICA_ERRORS as e:
+                self._replica_failed(index, e)
+        return await call(None)
+
+    def _replica_failed(self, index, error):
+        host, port = self.replicas[index]
+        print(f"⚠️ Réplica {host}:{port} écarté {MYSQL_REPLICA_COOLDOWN:.0f} s : {error}")
+        self._replica_down_until[index] = time.monotonic() + MYSQL_REPLICA_COOLDOWN
+        self._replica_fallbacks += 1
+
+    def replica_stats(self):
+        now = time.monotonic()
+        return {
+            "reads": self._replica_reads,
+            "fallbacks": self._replica_fallbacks,
+            "hosts": [
+                {
+                    "host": f"{host}:{port}",
+                    "available": self._replica_down_until[i] <= now,
+                    "pool": self._replica_pool_stats(i),
+                }
+                for i, (host, port) in enumerate(self.replicas)
+            ],
+        }
+
+    def _replica_pool_stats(self, index):
+        if index >= len(self.replica_pools):
+            return None
+        return self.replica_pools[index].stats()
+
+    def _record_query(self, loop, route, operation, query, params, elapsed, failed):
+        """Métriques et journal des requêtes lentes ; appelable depuis n'importe quel thread."""
+        shape = sql_shape(query)
+        label = shorten_shape(shape)
+        if failed:
+            db_query_errors.inc(operation, label)
+        db_query_duration.observe(elapsed, operation, label)
+        if slow_query_log.is_slow(elapsed):
+            param_count = len(params) if params else 0
+            if slow_query_log.record(shape, param_count, elapsed, route):
+                loop.call_soon_threadsafe(self._start_explain, shape, query, params)
+
+    def _start_explain(self, shape, query, params):
+        task = asyncio.create_task(self._explain(shape, query, params))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _explain(self, shape, query, params):
+        """EXPLAIN d'une requête lente (une fois par forme), hors du chemin de la requête."""
         try:
-            conn = await self.connect()
-
-            def _init():
-                with conn.cursor() as cur:
-                    # Table users
-                    cur.execute("""
-                        CREATE TABLE IF NOT EXISTS users (
-                            user_id INT AUTO_INCREMENT PRIMARY KEY,
-                            matricule VARCHAR(15) UNIQUE NOT NULL,
-                            name VARCHAR(255) NOT NULL,
-                            last_name VARCHAR(255) NOT NULL,
-                            email VARCHAR(255) UNIQUE NOT NULL,
-                            phone VARCHAR(9) NOT NULL,
-                            password TEXT NOT NULL,
-                            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                        )
-                    """)
-
-                    # Table requests
-                    cur.execute("""
-                        CREATE TABLE IF NOT EXISTS requests (
-                            request_id INT AUTO_INCREMENT PRIMARY KEY,
-                            user_id INT NOT NULL,
-                            all_name VARCHAR(255) NOT NULL,
-                            matricule VARCHAR(15) NOT NULL,
-                            cycle VARCHAR(50) NOT NULL,
-                            level INT NOT NULL,
-                            nom_code_ue VARCHAR(2048) NOT NULL,
-                            note_exam BOOLEAN DEFAULT FALSE,
-                            note_cc BOOLEAN DEFAULT FALSE,
-                            note_tp BOOLEAN DEFAULT FALSE,
-                            note_tpe BOOLEAN DEFAULT FALSE,
-                            autre BOOLEAN DEFAULT FALSE,
-                            comment TEXT,
-                            just_p BOOLEAN DEFAULT FALSE,
-                            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                            FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
-                        )
-                    """)
+            plan = await self._explain_plan(query, params)
+        except Exception as e:
+            plan = {"error": str(e)}
+        slow_query_log.set_explain(shape, plan)
 
-                conn.commit()
+    async def _explain_plan(self, query, params):
+        def _run_explain(conn):
+            with conn.cursor() as cur:
+                cur.execute("EXPLAIN " + query, params)
+                return cur.fetchall()
+
+        return await self._run(_run_explain)
+
+    def _row_error(self, error):
+        """Erreur propre à une ligne du lot (doublon, interblocage) : le lot est réessayé ligne par ligne."""
+        if isinstance(error, pymysql.err.IntegrityError):
+            return True
+        return isinstance(error, pymysql.err.OperationalError) and error.args[:1] == (1213,)  # ER_LOCK_DEADLOCK
+
+    def on_insert(self, table, hook):
+        """
+        Enregistre `hook(db, columns, rows, ids)`, appelé à chaque INSERT dans
+        `table` (insert_row, insert_many, group commit) ; les requêtes
+        [(requête, paramètres), ...] qu'il retourne s'exécutent dans la même
+        transaction que l'INSERT : tables dérivées jamais désynchronisées.
+        """
+        self._insert_hooks.setdefault(table, []).append(hook)
+
+    def _derived_statements(self, table, columns, rows, ids):
+        return [statement
+                for hook in self._insert_hooks.get(table, ())
+                for statement in hook(self, columns, rows, ids)]
+
+    def _insert_rows(self, conn, table, columns, rows):
+        return _insert_rows(conn, table, columns, rows,
+                            lambda ids: self._derived_statements(table, columns, rows, ids))
+
+    async def _write_rows(self, table, columns, rows, operation="insert"):
+        """INSERT multi-lignes transactionnel ; point d'extension des autres backends."""
+        ids = await self._run(
+            lambda conn: self._insert_rows(conn, table, columns, rows), operation, _insert_label(table, columns)
+        )
+        pin_primary()
+        return ids
+
+    def pool_stats(self):
+        """Statistiques du pool : connexions utilisées, libres, en attente."""
+        if self.pool is None:
+            return None
+        return self.pool.stats()
+
+    async def init_db(self):
+        """Met le schéma à jour via les migrations versionnées (cf. migrate.py)."""
+        try:
+            before, after = await self._migrate()
+            if before == after:
+                print(f"✅ Schéma MySQL à jour (version {after})")
+            else:
+                print(f"✅ Schéma MySQL migré : version {before} -> {after}")
 
-            await asyncio.to_thread(_init)
-            print("✅ Base de données MySQL initialisée avec succès !")
-            
         except Exception as e:
             print(f"❌ Erreur lors de l'initialisation de la base de données: {e}")
             raise
 
+    async def _migrate(self):
+        return await self._run(migrate)
+
     async def execute_query(self, query, params=None):
         """Exécuter INSERT, UPDATE, DELETE."""
-        conn = await self.connect()
-
-        def _execute():
+        def _execute(conn):
             with conn.cursor() as cur:
                 cur.execute(query, params)
                 conn.commit()
                 return cur.lastrowid  # fonctionne pour INSERT
 
-        return await asyncio.to_thread(_execute)
+        result = await self._run(_execute, "execute", query, params)
+        pin_primary()
+        return result
 
-    async def fetch_one(self, query, params=None):
-        """Récupère une seule ligne."""
-        conn = await self.connect()
+    async def execute_transaction(self, statements, operation="transaction"):
+        """
+        Exécute `statements` [(requête, paramètres), ...] dans une seule
+        transaction ; retourne le nombre de lignes touchées par chacune.
+        """
+        def _transaction(conn):
+            conn.begin()
+            counts = []
+            with conn.cursor() as cur:
+                for query, params in statements:
+                    counts.append(cur.execute(query, params))
+            conn.commit()
+            return counts
+
+        counts = await self._run(_transaction, operation, _transaction_label(statements))
+        pin_primary()
+        return counts
+
+    async def insert_many(self, table, columns, rows):
+        """
+        Insère `rows` (tuples alignés sur `columns`) en un seul INSERT
+        multi-lignes, dans une seule transaction : un aller-retour et un
+        commit pour tout le lot. Retourne la liste des ids insérés.
+        """
+        if not rows:
+            return []
+        return await self._write_rows(table, columns, rows)
+
+    async def insert_row(self, table, columns, values):
+        """
+        Insère une ligne et retourne son id. Avec DB_GROUP_COMMIT=1, la ligne
+        rejoint le prochain lot de group commit de cette table.
+        """
+        if not self.group_commit:
+            return (await self.insert_many(table, columns, [values]))[0]
+
+        key = (table, tuple(columns))
+        coalescer = self._coalescers.get(key)
+        if coalescer is None:
+            coalescer = self._coalescers[key] = InsertCoalescer(
+                self, table, tuple(columns),
+                max_delay=DB_GROUP_COMMIT_MAX_DELAY_MS / 1000,
+                max_rows=DB_GROUP_COMMIT_MAX_ROWS,
+                max_pending=DB_GROUP_COMMIT_MAX_PENDING,
+                max_wait=DB_GROUP_COMMIT_MAX_WAIT,
+            )
+        row_id = await coalescer.insert(values)
+        # L'écriture a lieu dans la tâche de flush : épingler ici la session
+        # de l'appelant, pas seulement celle qui a déclenché le flush
+        pin_primary()
+        return row_id
+
+    async def flush_pending_inserts(self):
+        """Vide les tampons de group commit (arrêt de l'application)."""
+        for coalescer in list(self._coalescers.values()):
+            await coalescer.drain()
+
+    def group_commit_stats(self):
+        return {table: c.stats() for (table, _), c in self._coalescers.items()}
 
-        def _fetch():
+    def upsert_increment(self, key_columns, counters):
+        """Clause ajoutée à un INSERT : sur clé existante, additionne `counters` au lieu d'échouer."""
+        return " ON DUPLICATE KEY UPDATE " + ", ".join(
+            f"{column} = {column} + VALUES({column})" for column in counters
+        )
+
+    def text_match(self, columns, words):
+        """
+        Condition SQL et paramètres : chaque mot de `words` (préfixe) apparaît
+        dans l'une des `columns`. MySQL passe par l'index FULLTEXT sur ces
+        colonnes (mode booléen).
+        """
+        against = " ".join(f"+{word}*" for word in words)
+        return f"MATCH({', '.join(columns)}) AGAINST (%s IN BOOLEAN MODE)", [against]
+
+    async def fetch_one(self, query, params=None):
+        """Récupère une seule ligne (réplica si disponible)."""
+        def _fetch(conn):
             with conn.cursor() as cur:
                 cur.execute(query, params)
                 return cur.fetchone()
 
-        return await asyncio.to_thread(_fetch)
+        return await self._read(lambda pool: self._run(_fetch, "fetch_one", query, params, pool))
 
     async def fetch_all(self, query, params=None):
-        """Récupère plusieurs lignes."""
-        conn = await self.connect()
-
-        def _fetchall():
+        """Récupère plusieurs lignes (réplica si disponible)."""
+        def _fetchall(conn):
             with conn.cursor() as cur:
                 cur.execute(query, params)
                 return cur.fetchall()
 
-        return await asyncio.to_thread(_fetchall)
+        return await self._read(lambda pool: self._run(_fetchall, "fetch_all", query, params, pool))
+
+    async def stream(self, query, params=None, batch_size=DB_STREAM_BATCH_SIZE):
+        """
+        Itère un SELECT par lots de `batch_size` lignes via un curseur non
+        bufferisé (SSDictCursor) : la mémoire reste bornée quelle que soit la
+        taille du résultat. La connexion reste empruntée pendant tout le
+        parcours ; si l'itération est abandonnée, elle est fermée plutôt que
+        drainée. Lecture sur un réplica si possible.
+        """
+        pool = await self.connect()
+        conn = None
+        index = self._pick_replica()
+        if index is not None:
+            try:
+                conn = await self.executor.run(self.replica_pools[index].acquire)
+                pool = self.replica_pools[index]
+            except REPLICA_ERRORS as e:
+                self._replica_failed(index, e)
+        if conn is None:
+            conn = await self.executor.run(pool.acquire)
+        cur = None
+        exhausted = False
+        try:
+            def _open():
+                start = time.perf_counter()
+                cursor = conn.cursor(pymysql.cursors.SSDictCursor)
+                cursor.execute(query, params)
+                db_query_duration.observe(time.perf_counter() - start, "stream", normalize_sql(query))
+                return cursor
+
+            cur = await self.executor.run(_open)
+            while True:
+                rows = await self.executor.run(cur.fetchmany, batch_size)
+                if not rows:
+                    exhausted = True
+                    break
+                yield rows
+        finally:
+            if exhausted:
+                cur.close()
+            pool.release(conn, discard=not exhausted)
 
     async def test_connection(self):
         """Tester la connexion."""
@@ -151,6 +655,15 @@ class Database:
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
+    async def ping(self):
+        """SELECT 1 sur le primaire, hors métriques (sonde de santé, cf. health.py)."""
+        def _select_one(conn):
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+                return cur.fetchone()
+
+        await self._run(_select_one)
+
     async def is_connected(self):
         """Vérifie si la connexion est active."""
         try:
@@ -160,5 +673,35 @@ class Database:
             return False
 
 
+# --------------------------------------------------------
+# Choix du backend de stockage (DB_BACKEND)
+# --------------------------------------------------------
+#   mysql    : PyMySQL, requêtes exécutées dans l'executor "db" (défaut)
+#   aiomysql : pilote asyncio natif, sans passage par un thread (database_aiomysql.py)
+#   sqlite   : base embarquée pour les tests et benchmarks (database_sqlite.py)
+BACKENDS = {
+    "mysql": ("database", "Database"),
+    "aiomysql": ("database_aiomysql", "AsyncMySQLDatabase"),
+    "sqlite": ("database_sqlite", "SQLiteDatabase"),
+}
+
+
+def create_database(name):
+    """
+    Instancie le backend `name` (son module n'est importé que s'il est
+    choisi) et y enregistre les hooks des tables dérivées.
+    """
+    try:
+        module_name, class_name = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Backend de base de données inconnu : {name}") from None
+    if module_name == __name__:
+        database = globals()[class_name]()
+    else:
+        database = getattr(importlib.import_module(module_name), class_name)()
+    register_insert_hooks(database)
+    return database
+
+
 # Instance globale
-db = Database()
\ No newline at end of file
+db = create_database(DB_BACKEND)
\ No newline at end of file
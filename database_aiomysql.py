@@ -0,0 +1,281 @@
+# database_aiomysql.py - Backend MySQL asyncio natif (aiomysql)
+#
+# Activé par DB_BACKEND=aiomysql. Les requêtes s'exécutent directement sur la
+# boucle d'événements : pas de passage par l'executor "db" ni de changement
+# de thread par requête. Le SQL, les métriques, le journal des requêtes lentes
+# et le group commit sont ceux de Database ; seul l'accès aux connexions change.
+# L'executor ne sert plus qu'aux migrations (PyMySQL, au démarrage).
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import aiomysql
+import pymysql
+
+from context import current_route, pin_primary
+from database import (Database, _connect, _insert_label, _insert_statement, _transaction_label,
+                      REPLICA_ERRORS, MYSQL_HOST, MYSQL_USER, MYSQL_PASSWORD, MYSQL_DB, MYSQL_PORT,
+                      MYSQL_POOL_MIN_SIZE, MYSQL_POOL_MAX_SIZE, MYSQL_POOL_TIMEOUT,
+                      MYSQL_POOL_RECYCLE, DB_EXECUTOR_MAX_QUEUE, DB_STREAM_BATCH_SIZE)
+from executors import ServiceOverloaded
+from metrics import db_query_duration, normalize_sql
+from migrate import migrate
+from pool import PoolTimeout
+
+
+class AsyncMySQLDatabase(Database):
+    def __init__(self):
+        super().__init__()
+        self._connect_lock = asyncio.Lock()
+        # Même contrat que l'executor : au-delà de DB_EXECUTOR_MAX_QUEUE
+        # requêtes en attente d'une connexion, on répond 503 tout de suite
+        self._waiters = 0
+        self._rejected = 0
+        self._timeouts = 0
+
+    async def connect(self):
+        """Crée le pool aiomysql (connexions en autocommit, lignes en dict)."""
+        if self.pool is not None and not self.pool.closed:
+            return self.pool
+        async with self._connect_lock:
+            if self.pool is None or self.pool.closed:
+                # Réplicas sans connexion minimale : ouverts à la première lecture
+                self.replica_pools = [await self._create_pool(host, port, minsize=0)
+                                      for host, port in self.replicas]
+                self.pool = await self._create_pool(MYSQL_HOST, MYSQL_PORT, MYSQL_POOL_MIN_SIZE)
+                print(f"✅ Pool aiomysql prêt ({self.pool.size} connexion(s) ouverte(s), "
+                      f"{len(self.replica_pools)} réplica(s)) !")
+        return self.pool
+
+    @staticmethod
+    async def _create_pool(host, port, minsize):
+        return await aiomysql.create_pool(
+            host=host,
+            user=MYSQL_USER,
+            password=MYSQL_PASSWORD,
+            db=MYSQL_DB,
+            port=port,
+            charset="utf8mb4",
+            cursorclass=aiomysql.DictCursor,
+            autocommit=True,
+            minsize=minsize,
+            maxsize=MYSQL_POOL_MAX_SIZE,
+            pool_recycle=MYSQL_POOL_RECYCLE,
+        )
+
+    async def close(self):
+        await self.flush_pending_inserts()
+        if self.pool is not None and not self.pool.closed:
+            for pool in self.replica_pools + [self.pool]:
+                pool.close()
+                try:
+                    await asyncio.wait_for(pool.wait_closed(), MYSQL_POOL_TIMEOUT)
+                except asyncio.TimeoutError:
+                    print("⚠️ Connexions encore empruntées à l'arrêt : fermeture forcée")
+                    pool.terminate()
+            print("✅ Pool aiomysql fermé !")
+        else:
+            print("ℹ️ Aucune connexion à fermer")
+        self.executor.shutdown()
+
+    async def _acquire(self, pool):
+        if self._waiters >= DB_EXECUTOR_MAX_QUEUE:
+            self._rejected += 1
+            raise ServiceOverloaded("Base de données saturée, réessayez plus tard")
+        self._waiters += 1
+        try:
+            return await asyncio.wait_for(pool.acquire(), MYSQL_POOL_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise PoolTimeout(f"Aucune connexion MySQL libre après {MYSQL_POOL_TIMEOUT:.1f} s") from None
+        finally:
+            self._waiters -= 1
+
+    @asynccontextmanager
+    async def _connection(self, pool=None):
+        """
+        Connexion empruntée ; fermée plutôt que rendue si elle est en erreur
+        réseau ou annulée, annulée (rollback) si une transaction reste ouverte.
+        """
+        primary = await self.connect()
+        pool = pool or primary
+        conn = await self._acquire(pool)
+        try:
+            yield conn
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            conn.close()
+            raise
+        except asyncio.CancelledError:
+            # Annulée en plein échange : l'état du protocole est inconnu
+            conn.close()
+            raise
+        except Exception:
+            if conn.get_transaction_status():
+                await conn.rollback()
+            raise
+        finally:
+            pool.release(conn)
+
+    async def _query(self, fn, operation=None, query=None, params=None, pool=None):
+        """Équivalent asynchrone de `_run` : `await fn(conn)`, mesuré si `operation` est fourni."""
+        route = current_route()
+        async with self._connection(pool) as conn:
+            if operation is None:
+                return await fn(conn)
+            start = time.perf_counter()
+            failed = False
+            try:
+                return await fn(conn)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                self._record_query(asyncio.get_running_loop(), route, operation, query, params,
+                                   time.perf_counter() - start, failed)
+
+    async def _migrate(self):
+        """Migrations via une connexion PyMySQL dédiée (migrate.py est synchrone)."""
+        def _run_migrations():
+            conn = _connect()
+            try:
+                return migrate(conn)
+            finally:
+                conn.close()
+
+        return await self.executor.run(_run_migrations)
+
+    async def _explain_plan(self, query, params):
+        async def _run_explain(conn):
+            async with conn.cursor() as cur:
+                await cur.execute("EXPLAIN " + query, params)
+                return await cur.fetchall()
+
+        return await self._query(_run_explain)
+
+    async def _write_rows(self, table, columns, rows, operation="insert"):
+        """Même INSERT multi-lignes (et requêtes dérivées) que `_insert_rows`, sans quitter la boucle d'événements."""
+        query, params = _insert_statement(table, columns, rows)
+
+        async def _insert(conn):
+            await conn.begin()
+            async with conn.cursor() as cur:
+                await cur.execute(query, params)
+                first_id = cur.lastrowid
+                step = 1
+                if len(rows) > 1:
+                    # Lu une fois par connexion (cf. database._auto_increment_step)
+                    step = getattr(conn, "_auto_increment_step", None)
+                    if step is None:
+                        await cur.execute("SELECT @@auto_increment_increment AS step")
+                        step = conn._auto_increment_step = (await cur.fetchone())["step"]
+                ids = [first_id + i * step for i in range(len(rows))]
+                for derived_query, derived_params in self._derived_statements(table, columns, rows, ids):
+                    await cur.execute(derived_query, derived_params)
+            await conn.commit()
+            return ids
+
+        ids = await self._query(_insert, operation, _insert_label(table, columns))
+        pin_primary()
+        return ids
+
+    async def execute_transaction(self, statements, operation="transaction"):
+        async def _transaction(conn):
+            await conn.begin()
+            counts = []
+            async with conn.cursor() as cur:
+                for query, params in statements:
+                    counts.append(await cur.execute(query, params))
+            await conn.commit()
+            return counts
+
+        counts = await self._query(_transaction, operation, _transaction_label(statements))
+        pin_primary()
+        return counts
+
+    async def execute_query(self, query, params=None):
+        async def _execute(conn):
+            async with conn.cursor() as cur:
+                await cur.execute(query, params)
+                return cur.lastrowid
+
+        result = await self._query(_execute, "execute", query, params)
+        pin_primary()
+        return result
+
+    async def fetch_one(self, query, params=None):
+        async def _fetch(conn):
+            async with conn.cursor() as cur:
+                await cur.execute(query, params)
+                return await cur.fetchone()
+
+        return await self._read(lambda pool: self._query(_fetch, "fetch_one", query, params, pool))
+
+    async def fetch_all(self, query, params=None):
+        async def _fetchall(conn):
+            async with conn.cursor() as cur:
+                await cur.execute(query, params)
+                return await cur.fetchall()
+
+        return await self._read(lambda pool: self._query(_fetchall, "fetch_all", query, params, pool))
+
+    async def ping(self):
+        async def _select_one(conn):
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT 1")
+                return await cur.fetchone()
+
+        await self._query(_select_one)
+
+    async def stream(self, query, params=None, batch_size=DB_STREAM_BATCH_SIZE):
+        """Comme Database.stream, avec un SSDictCursor aiomysql."""
+        pool = await self.connect()
+        conn = None
+        index = self._pick_replica()
+        if index is not None:
+            try:
+                conn = await self._acquire(self.replica_pools[index])
+                pool = self.replica_pools[index]
+            except REPLICA_ERRORS as e:
+                self._replica_failed(index, e)
+        if conn is None:
+            conn = await self._acquire(pool)
+        cur = None
+        exhausted = False
+        try:
+            start = time.perf_counter()
+            cur = await conn.cursor(aiomysql.SSDictCursor)
+            await cur.execute(query, params)
+            db_query_duration.observe(time.perf_counter() - start, "stream", normalize_sql(query))
+            while True:
+                rows = await cur.fetchmany(batch_size)
+                if not rows:
+                    exhausted = True
+                    break
+                yield rows
+        finally:
+            if exhausted:
+                await cur.close()
+            else:
+                conn.close()
+            pool.release(conn)
+
+    def pool_stats(self):
+        if self.pool is None:
+            return None
+        return dict(_aiomysql_pool_stats(self.pool), waiters=self._waiters,
+                    total_rejected=self._rejected, total_timeouts=self._timeouts)
+
+    def _replica_pool_stats(self, index):
+        if index >= len(self.replica_pools):
+            return None
+        return _aiomysql_pool_stats(self.replica_pools[index])
+
+
+def _aiomysql_pool_stats(pool):
+    return {
+        "min_size": pool.minsize,
+        "max_size": pool.maxsize,
+        "size": pool.size,
+        "in_use": pool.size - pool.freesize,
+        "idle": pool.freesize,
+    }
@@ -0,0 +1,231 @@
+# database_sqlite.py - Implémentation SQLite de Database (benchmarks et tests locaux)
+#
+# Activée par DB_BACKEND=sqlite. Les routes gardent leur SQL MySQL : les
+# paramètres %s sont traduits en ?, et les connexions imitent l'API PyMySQL
+# utilisée par Database (cursor() en contexte, begin/commit, lignes en dict),
+# ce qui réutilise le pool, l'executor, les métriques et le group commit.
+import os
+import re
+import sqlite3
+
+from database import Database, MYSQL_POOL_MAX_SIZE, MYSQL_POOL_TIMEOUT, _insert_statement
+from pool import ConnectionPool
+
+SQLITE_PATH = os.getenv("SQLITE_PATH", "requests.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    matricule VARCHAR(15) UNIQUE NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    last_name VARCHAR(255) NOT NULL,
+    email VARCHAR(255) UNIQUE NOT NULL,
+    phone VARCHAR(9) NOT NULL,
+    password TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS requests (
+    request_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    all_name VARCHAR(255) NOT NULL,
+    matricule VARCHAR(15) NOT NULL,
+    cycle VARCHAR(50) NOT NULL,
+    level INTEGER NOT NULL,
+    nom_code_ue VARCHAR(2048) NOT NULL,
+    note_exam BOOLEAN DEFAULT 0,
+    note_cc BOOLEAN DEFAULT 0,
+    note_tp BOOLEAN DEFAULT 0,
+    note_tpe BOOLEAN DEFAULT 0,
+    autre BOOLEAN DEFAULT 0,
+    comment TEXT,
+    just_p BOOLEAN DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    state BOOLEAN NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_requests_user_created
+    ON requests (user_id, created_at, request_id);
+
+CREATE INDEX IF NOT EXISTS idx_requests_created
+    ON requests (created_at, request_id);
+
+CREATE TABLE IF NOT EXISTS requests_archive (
+    request_id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    all_name VARCHAR(255) NOT NULL,
+    matricule VARCHAR(15) NOT NULL,
+    cycle VARCHAR(50) NOT NULL,
+    level INTEGER NOT NULL,
+    nom_code_ue VARCHAR(2048) NOT NULL,
+    note_exam BOOLEAN DEFAULT 0,
+    note_cc BOOLEAN DEFAULT 0,
+    note_tp BOOLEAN DEFAULT 0,
+    note_tpe BOOLEAN DEFAULT 0,
+    autre BOOLEAN DEFAULT 0,
+    comment TEXT,
+    just_p BOOLEAN DEFAULT 0,
+    created_at TIMESTAMP,
+    state BOOLEAN NOT NULL DEFAULT 0,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_requests_archive_user_created
+    ON requests_archive (user_id, created_at, request_id);
+
+CREATE TABLE IF NOT EXISTS request_stats (
+    day DATE NOT NULL,
+    cycle VARCHAR(50) NOT NULL,
+    level INTEGER NOT NULL,
+    note_type VARCHAR(16) NOT NULL,
+    request_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, cycle, level, note_type)
+);
+
+CREATE TABLE IF NOT EXISTS request_ue_codes (
+    ue_code VARCHAR(16) NOT NULL,
+    request_id INTEGER NOT NULL REFERENCES requests(request_id) ON DELETE CASCADE,
+    PRIMARY KEY (ue_code, request_id)
+);
+"""
+
+_PARAM = re.compile(r"%(s|%)")
+
+
+def _to_qmark(query):
+    return _PARAM.sub(lambda m: "?" if m.group(1) == "s" else "%", query)
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteCursor:
+    def __init__(self, conn):
+        self._cur = conn.cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def execute(self, query, params=None):
+        self._cur.execute(_to_qmark(query), tuple(params) if params else ())
+        return self._cur.rowcount
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    def fetchmany(self, size):
+        return self._cur.fetchmany(size)
+
+    @property
+    def lastrowid(self):
+        return self._cur.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+    def close(self):
+        self._cur.close()
+
+
+class SQLiteConnection:
+    """Connexion SQLite exposant le sous-ensemble de l'API PyMySQL utilisé ici."""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(
+            path,
+            timeout=30,
+            isolation_level=None,            # autocommit, comme les connexions MySQL du pool
+            check_same_thread=False,         # empruntée tour à tour par les threads de l'executor
+            detect_types=sqlite3.PARSE_DECLTYPES,
+        )
+        self._conn.row_factory = _dict_row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self.open = True
+
+    def cursor(self, cursorclass=None):
+        return SQLiteCursor(self._conn)
+
+    def begin(self):
+        self._conn.execute("BEGIN")
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect=False):
+        self._conn.execute("SELECT 1")
+
+    def executescript(self, script):
+        self._conn.executescript(script)
+
+    def close(self):
+        self.open = False
+        self._conn.close()
+
+
+class SQLiteDatabase(Database):
+    def __init__(self, path=SQLITE_PATH):
+        super().__init__()
+        self.path = path
+
+    async def connect(self):
+        if self.pool is not None and not self.pool.closed:
+            return self.pool
+        self.pool = ConnectionPool(
+            lambda: SQLiteConnection(self.path),
+            min_size=1,
+            max_size=MYSQL_POOL_MAX_SIZE,
+            timeout=MYSQL_POOL_TIMEOUT,
+        )
+        await self.executor.run(self.pool.fill)
+        print(f"✅ Base SQLite ouverte : {self.path}")
+        return self.pool
+
+    async def init_db(self):
+        """Schéma SQLite équivalent aux migrations MySQL (idempotent)."""
+        await self._run(lambda conn: conn.executescript(SCHEMA))
+        print("✅ Schéma SQLite prêt")
+
+    def _insert_rows(self, conn, table, columns, rows):
+        """SQLite n'a qu'un écrivain à la fois : les ids d'un INSERT multi-lignes se suivent."""
+        query, params = _insert_statement(table, columns, rows)
+        conn.begin()
+        with conn.cursor() as cur:
+            cur.execute(query, params)
+            last_id = cur.lastrowid
+            ids = list(range(last_id - len(rows) + 1, last_id + 1))
+            for derived_query, derived_params in self._derived_statements(table, columns, rows, ids):
+                cur.execute(derived_query, derived_params)
+        conn.commit()
+        return ids
+
+    def _row_error(self, error):
+        return isinstance(error, sqlite3.IntegrityError)
+
+    def upsert_increment(self, key_columns, counters):
+        return (f" ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET "
+                + ", ".join(f"{column} = {column} + excluded.{column}" for column in counters))
+
+    def text_match(self, columns, words):
+        """Pas d'index FULLTEXT en SQLite : un LIKE par mot et par colonne."""
+        per_word = "(" + " OR ".join(f"{column} LIKE %s" for column in columns) + ")"
+        condition = " AND ".join([per_word] * len(words)) or "1 = 1"
+        return condition, [f"%{word}%" for word in words for _ in columns]
+
+    async def test_connection(self):
+        try:
+            result = await self.fetch_one("SELECT sqlite_version() AS version")
+            return {"status": "success", "version": f"SQLite {result['version']}"}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
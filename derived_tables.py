@@ -0,0 +1,53 @@
+# derived_tables.py - Tables dérivées de requests, tenues à jour à l'INSERT
+#
+# Chaque hook reçoit (db, colonnes, lignes, ids) et retourne les requêtes
+# [(requête, paramètres), ...] exécutées dans la transaction de l'INSERT
+# (cf. Database.on_insert). Ils sont enregistrés par create_database : tout
+# point d'entrée qui insère des requêtes les applique, sans dépendre des
+# modules importés.
+from collections import Counter
+
+from models import NOTE_COLUMNS, extract_ue_codes
+
+STATS_KEY_COLUMNS = ("day", "cycle", "level", "note_type")
+
+
+def index_ue_codes(db, columns, rows, ids):
+    """Une ligne request_ue_codes par code d'UE cité (recherche, cf. search.py)."""
+    position = columns.index("nom_code_ue")
+    codes = [(code, request_id)
+             for row, request_id in zip(rows, ids)
+             for code in extract_ue_codes(row[position])]
+    if not codes:
+        return []
+    placeholders = ", ".join(["(%s, %s)"] * len(codes))
+    return [(f"INSERT INTO request_ue_codes (ue_code, request_id) VALUES {placeholders}",
+             [value for code in codes for value in code])]
+
+
+def count_request_stats(db, columns, rows, ids):
+    """Compteurs request_stats par jour, cycle, niveau et type de note (cf. stats.py)."""
+    position = {column: index for index, column in enumerate(columns)}
+    counts = Counter()
+    for row in rows:
+        key = (row[position["cycle"]], row[position["level"]])
+        counts[key + ("total",)] += 1
+        for note in NOTE_COLUMNS:
+            if row[position[note]]:
+                counts[key + (note,)] += 1
+
+    # Jour de la base (comme le DEFAULT CURRENT_TIMESTAMP de created_at).
+    # Clés triées : deux lots concurrents verrouillent les mêmes lignes de
+    # request_stats dans le même ordre, sans interblocage
+    placeholders = ", ".join(["(CURRENT_DATE, %s, %s, %s, %s)"] * len(counts))
+    return [(
+        f"""INSERT INTO request_stats ({", ".join(STATS_KEY_COLUMNS)}, request_count)
+            VALUES {placeholders}"""
+        + db.upsert_increment(STATS_KEY_COLUMNS, ("request_count",)),
+        [value for key, count in sorted(counts.items()) for value in (*key, count)]
+    )]
+
+
+def register_insert_hooks(db):
+    db.on_insert("requests", index_ue_codes)
+    db.on_insert("requests", count_request_stats)
@@ -0,0 +1,66 @@
+# executors.py - Executors dédiés et bornés (I/O MySQL, hachage Argon2)
+import asyncio
+import threading
+
+
+class ServiceOverloaded(Exception):
+    """File d'attente d'un executor pleine : on répond 503 au lieu d'attendre."""
+
+
+class BoundedExecutor:
+    """
+    Enveloppe un executor (threads ou processus) avec une limite de file.
+
+    Au plus `max_workers` tâches tournent en même temps et au plus
+    `max_queue` tâches attendent derrière elles ; au-delà, `run` lève
+    immédiatement `ServiceOverloaded`. L'executor sous-jacent est créé au
+    premier appel (pas de processus lancés à l'import).
+    """
+
+    def __init__(self, name, factory, max_workers, max_queue):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._factory = factory
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._rejected = 0
+        self._completed = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = self._factory(self.max_workers)
+        return self._executor
+
+    async def run(self, fn, *args):
+        """Exécute `fn(*args)` dans l'executor, ou rejette si la file est pleine."""
+        if self._pending >= self.max_workers + self.max_queue:
+            self._rejected += 1
+            raise ServiceOverloaded(f"Executor {self.name} saturé, réessayez plus tard")
+
+        loop = asyncio.get_running_loop()
+        self._pending += 1
+        try:
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._pending -= 1
+            self._completed += 1
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self):
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": min(self._pending, self.max_workers),
+            "queued": max(0, self._pending - self.max_workers),
+            "completed": self._completed,
+            "rejected": self._rejected,
+        }
@@ -0,0 +1,128 @@
+# health.py - Sonde de santé de la base en tâche de fond
+#
+# Les endpoints /health* répondent depuis l'état de la dernière sonde, sans
+# toucher à la base ni à l'executor : une rafale de sondes du load balancer
+# ne peut plus aggraver une base déjà lente.
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from database import db
+
+# Période et délai maximal d'une sonde SELECT 1 sur le primaire
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", 5))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", 2))
+# Prêt tant que la dernière sonde réussie date de moins de HEALTH_MAX_STALENESS secondes
+HEALTH_MAX_STALENESS = float(os.getenv("HEALTH_MAX_STALENESS", 3 * HEALTH_PROBE_INTERVAL))
+# Échecs consécutifs au-delà desquels l'instance n'est plus prête
+HEALTH_FAILURE_THRESHOLD = int(os.getenv("HEALTH_FAILURE_THRESHOLD", 2))
+
+
+class HealthProber:
+    """
+    Vérifie périodiquement la base (`db.ping`, borné par `timeout`) et
+    conserve le résultat : date du dernier succès, latence, dernière erreur.
+
+    - vivant (liveness) : le processus tourne et la sonde n'a pas planté ;
+      indépendant de la base, pour ne pas redémarrer l'instance quand MySQL
+      est lent ;
+    - prêt (readiness) : dernière sonde réussie récente et moins de
+      `failure_threshold` échecs consécutifs ; faux pendant l'arrêt.
+    """
+
+    def __init__(self, db, interval=HEALTH_PROBE_INTERVAL, timeout=HEALTH_PROBE_TIMEOUT,
+                 max_staleness=HEALTH_MAX_STALENESS, failure_threshold=HEALTH_FAILURE_THRESHOLD):
+        self.db = db
+        self.interval = interval
+        self.timeout = timeout
+        self.max_staleness = max_staleness
+        self.failure_threshold = failure_threshold
+        self._task = None
+        self._stopping = False
+        self._started_at = time.monotonic()
+        self._last_success = None       # monotonic
+        self._last_success_at = None    # horodatage affiché
+        self._last_error = None
+        self._latency = None
+        self._consecutive_failures = 0
+        self._probes = 0
+
+    async def probe(self):
+        """Une sonde : met à jour l'état, ne lève jamais."""
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.db.ping(), self.timeout)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self._failed(f"Pas de réponse en {self.timeout:g} s")
+        except Exception as e:
+            self._failed(str(e) or type(e).__name__)
+        else:
+            self._latency = time.perf_counter() - start
+            self._last_success = time.monotonic()
+            self._last_success_at = datetime.now().isoformat()
+            self._consecutive_failures = 0
+            self._last_error = None
+        finally:
+            self._probes += 1
+
+    def _failed(self, error):
+        if self._consecutive_failures == 0:
+            print(f"⚠️ Sonde de santé en échec : {error}")
+        self._consecutive_failures += 1
+        self._last_error = error
+
+    async def _run(self):
+        while True:
+            await self.probe()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Arrête la sonde ; l'instance cesse aussitôt d'être prête (drainage)."""
+        self._stopping = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ----------------------------------------------------
+    # État servi par les endpoints
+    # ----------------------------------------------------
+    def is_live(self):
+        return self._task is not None and not self._task.done()
+
+    def is_ready(self):
+        if self._stopping or self._last_success is None:
+            return False
+        fresh = time.monotonic() - self._last_success <= self.max_staleness
+        return fresh and self._consecutive_failures < self.failure_threshold
+
+    def stats(self):
+        return {
+            "live": self.is_live(),
+            "ready": self.is_ready(),
+            "stopping": self._stopping,
+            "last_success": self._last_success_at,
+            "last_success_age_seconds": (round(time.monotonic() - self._last_success, 3)
+                                         if self._last_success is not None else None),
+            "latency_ms": round(self._latency * 1000, 2) if self._latency is not None else None,
+            "consecutive_failures": self._consecutive_failures,
+            "last_error": self._last_error,
+            "probes": self._probes,
+            "interval_seconds": self.interval,
+            "uptime_seconds": round(time.monotonic() - self._started_at, 1),
+        }
+
+
+# Instance globale
+health_prober = HealthProber(db)
@@ -1,17 +1,36 @@
-from fastapi import FastAPI, Request, Form, Depends, HTTPException, status, Cookie
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Request, Form, Depends, HTTPException, status, Cookie, Header, Query
+from fastapi.responses import HTMLResponse, RedirectResponse, PlainTextResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
 from contextlib import asynccontextmanager
-import json
-import base64
 import hmac
-import hashlib
 import os
+import time
+from datetime import date, timedelta
+from urllib.parse import urlencode
 
 from database import db
-from models import UserRegister, UserLogin, RequestSubmit
-from auth import hash_password, verify_password
+from counters import table_counters
+from health import health_prober
+from archive import request_archiver
+from models import (UserRegister, UserLogin, RequestSubmit, RequestBatchSubmit, MAX_BATCH_SIZE,
+                    NOTE_COLUMNS, classify_login, extract_ue_codes)
+from pagination import decode_cursor, keyset_page
+from streaming import start_stream, ndjson_response, csv_response
+from search import search_requests, search_words, SEARCH_PAGE_SIZE
+from stats import summary as stats_summary
+from cache import my_requests_cache, unknown_login_cache
+from pages import PageRegistry, enable_bytecode_cache
+from assets import PrecompressedStaticFiles, static_url
+from metrics import registry, MetricsMiddleware
+from context import RequestContextMiddleware
+from slowlog import slow_query_log
+from ratelimit import argon2_gate
+from session import (create_session_token, verify_session_token, verify_legacy_cookie,
+                     session_cache, SESSION_MAX_AGE)
+from auth import hash_password_async, verify_password_async, needs_rehash, hash_executor
+from executors import ServiceOverloaded
+from pool import PoolTimeout
+from ratelimit import RateLimited, check_auth_attempt, client_ip, limiter_stats
 
 
 # --------------------------------------------------------
@@ -23,6 +42,12 @@ async def lifespan(app: FastAPI):
     try:
         await db.init_db()
         print("✅ Base de données initialisée avec succès")
+        await table_counters.reconcile()
+        table_counters.start()
+        await health_prober.probe()
+        health_prober.start()
+        request_archiver.start()
+        static_pages.warm(*STATIC_PAGES)
     except Exception as e:
         print(f"❌ Erreur lors de l'initialisation de la base: {e}")
         raise
@@ -31,7 +56,12 @@ async def lifespan(app: FastAPI):
 
     print("🔄 Arrêt de l'application...")
     try:
+        await health_prober.stop()
+        await request_archiver.stop()
+        await db.flush_pending_inserts()
+        await table_counters.stop()
         await db.close()
+        hash_executor.shutdown()
         print("✅ Connexions fermées avec succès")
     except Exception as e:
         print(f"⚠️ Erreur lors de la fermeture: {e}")
@@ -41,74 +71,135 @@ app = FastAPI(
     title="Gestion des Requêtes Universitaires",
     lifespan=lifespan
 )
+app.add_middleware(RequestContextMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # --------------------------------------------------------
 # Config templates + static
 # --------------------------------------------------------
 templates = Jinja2Templates(directory="templates")
-app.mount("/static", StaticFiles(directory="static"), name="static")
+templates.env.globals["static_url"] = static_url
+enable_bytecode_cache(templates)
+static_pages = PageRegistry(templates)
+STATIC_PAGES = ("home.html", "register.html", "login.html")
+app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
+
+# Nombre de requêtes affichées par page sur /my-requests
+MY_REQUESTS_PAGE_SIZE = int(os.getenv("MY_REQUESTS_PAGE_SIZE", 20))
 
 
 # --------------------------------------------------------
-# Cookies sécurisés
+# Surcharge : réponse 503 rapide plutôt qu'une file qui s'allonge
 # --------------------------------------------------------
-SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key")
-
+@app.exception_handler(ServiceOverloaded)
+async def overloaded_handler(request: Request, exc: ServiceOverloaded):
+    return PlainTextResponse(str(exc), status_code=503, headers={"Retry-After": "1"})
 
-def sign_data(data: str) -> str:
-    return hmac.new(SECRET_KEY.encode(), data.encode(), hashlib.sha256).hexdigest()
 
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request: Request, exc: PoolTimeout):
+    return PlainTextResponse(str(exc), status_code=503, headers={"Retry-After": "1"})
 
-def create_user_cookie(user_data: dict) -> str:
-    data_json = json.dumps(user_data)
-    data_b64 = base64.b64encode(data_json.encode()).decode()
-    signature = sign_data(data_b64)
-    return f"{data_b64}.{signature}"
 
+@app.exception_handler(RateLimited)
+async def rate_limited_handler(request: Request, exc: RateLimited):
+    retry_after = max(1, int(exc.retry_after + 0.999))
+    return PlainTextResponse(str(exc), status_code=429, headers={"Retry-After": str(retry_after)})
 
-def verify_user_cookie(cookie_data: str) -> dict | None:
-    try:
-        if not cookie_data:
-            return None
 
-        data_b64, signature = cookie_data.split(".")
-        if sign_data(data_b64) != signature:
-            return None
-
-        data_json = base64.b64decode(data_b64).decode()
-        return json.loads(data_json)
-    except Exception:
+# --------------------------------------------------------
+# Cookies sécurisés (jeton compact, cf. session.py)
+# --------------------------------------------------------
+async def verify_user_cookie(cookie_data: str) -> dict | None:
+    """Utilisateur d'un cookie de session ; le cache évite décodage, HMAC et SQL."""
+    if not cookie_data:
         return None
 
+    user = session_cache.get(cookie_data)
+    if user is not None:
+        return user
+
+    verified = verify_session_token(cookie_data)
+    if verified is None:
+        return verify_legacy_cookie(cookie_data)
+
+    user_id, expires_at = verified
+    user = await db.fetch_one(
+        "SELECT user_id, matricule, name, last_name, email FROM users WHERE user_id = %s",
+        (user_id,)
+    )
+    if user:
+        session_cache.put(cookie_data, user, expires_at)
+    return user
+
 
-def get_current_user(user_data: str = Cookie(None, alias="user_data")):
+async def get_current_user(user_data: str = Cookie(None, alias="user_data")):
     if not user_data:
         raise HTTPException(status_code=303, headers={"Location": "/login"})
 
-    user = verify_user_cookie(user_data)
+    user = await verify_user_cookie(user_data)
     if not user:
         raise HTTPException(status_code=303, headers={"Location": "/login"})
 
     return user
 
 
+# --------------------------------------------------------
+# Accès administrateur (en-tête X-Admin-Token)
+# --------------------------------------------------------
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+def require_admin(x_admin_token: str | None = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Accès administrateur désactivé (ADMIN_TOKEN absent)")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Jeton administrateur invalide")
+
+
+# --------------------------------------------------------
+# Accès scolarité : jeton administrateur, ou compte dont le matricule
+# figure dans STAFF_MATRICULES (liste séparée par des virgules)
+# --------------------------------------------------------
+STAFF_MATRICULES = {m.strip().lower() for m in os.getenv("STAFF_MATRICULES", "").split(",") if m.strip()}
+
+
+def is_staff(user):
+    return user is not None and user["matricule"].lower() in STAFF_MATRICULES
+
+
+async def require_staff(x_admin_token: str | None = Header(None),
+                        user_data: str = Cookie(None, alias="user_data")):
+    if ADMIN_TOKEN and x_admin_token and hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        return None
+    user = await verify_user_cookie(user_data) if user_data else None
+    if not user:
+        raise HTTPException(status_code=303, headers={"Location": "/login"})
+    if not is_staff(user):
+        raise HTTPException(status_code=403, detail="Accès réservé au personnel de la scolarité")
+    return user
+
+
 # --------------------------------------------------------
 # ROUTES HTML
 # --------------------------------------------------------
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
-    return templates.TemplateResponse("home.html", {"request": request})
+    return static_pages.page("home.html").response(request)
 
 
 @app.get("/register", response_class=HTMLResponse)
 async def register_form(request: Request):
-    return templates.TemplateResponse("register.html", {"request": request})
+    return static_pages.page("register.html").response(request)
 
 
 @app.post("/register")
 async def register_user(request: Request):
     form = await request.form()
 
+    # Rejet bon marché avant toute requête SQL ou hachage Argon2
+    check_auth_attempt(client_ip(request), form.get("email"))
+
     try:
         user_data = UserRegister(
             matricule=form.get("matricule"),
@@ -119,8 +210,12 @@ async def register_user(request: Request):
             password=form.get("password")
         )
 
+        # Deux recherches sur index unique plutôt qu'un OR sur deux colonnes
         user_exists = await db.fetch_one(
-            "SELECT user_id FROM users WHERE email = %s OR matricule = %s",
+            """SELECT user_id FROM users WHERE email = %s
+               UNION ALL
+               SELECT user_id FROM users WHERE matricule = %s
+               LIMIT 1""",
             (user_data.email, user_data.matricule)
         )
 
@@ -136,12 +231,17 @@ async def register_user(request: Request):
                 user_data.last_name,
                 user_data.email,
                 user_data.phone,
-                hash_password(user_data.password)
+                await hash_password_async(user_data.password)
             )
         )
+        table_counters.increment("users")
+        await unknown_login_cache.invalidate("email", user_data.email)
+        await unknown_login_cache.invalidate("matricule", user_data.matricule)
 
         return RedirectResponse(url="/login", status_code=303)
 
+    except (ServiceOverloaded, PoolTimeout, RateLimited):
+        raise
     except Exception as e:
         return templates.TemplateResponse("register.html", {
             "request": request,
@@ -151,28 +251,59 @@ async def register_user(request: Request):
 
 @app.get("/login", response_class=HTMLResponse)
 async def login_form(request: Request):
-    return templates.TemplateResponse("login.html", {"request": request})
+    return static_pages.page("login.html").response(request)
+
+
+# Une requête par colonne : chacune utilise directement son index unique
+LOGIN_QUERIES = {
+    column: f"""SELECT user_id, matricule, name, last_name, email, password
+               FROM users WHERE {column} = %s"""
+    for column in ("email", "matricule")
+}
+
+
+async def find_login_user(login):
+    """
+    Compte correspondant à l'identifiant (email ou matricule), ou None.
+    Les identifiants mal formés ou récemment introuvables ne vont pas en base.
+    """
+    column, value = classify_login(login)
+    if column is None or await unknown_login_cache.is_missing(column, value):
+        return None
+    user = await db.fetch_one(LOGIN_QUERIES[column], (value,))
+    if user is None:
+        await unknown_login_cache.remember_missing(column, value)
+    return user
 
 
 @app.post("/login")
 async def login_user(request: Request):
     form = await request.form()
 
+    # Rejet bon marché avant toute requête SQL ou vérification Argon2
+    check_auth_attempt(client_ip(request), form.get("login"))
+
     try:
         login_data = UserLogin(
             login=form.get("login"),
             password=form.get("password")
         )
 
-        user = await db.fetch_one(
-            """SELECT user_id, matricule, name, last_name, email, password 
-               FROM users WHERE email = %s OR matricule = %s""",
-            (login_data.login, login_data.login)
-        )
+        user = await find_login_user(login_data.login)
 
-        if not user or not verify_password(login_data.password, user["password"]):
+        if not user or not await verify_password_async(login_data.password, user["password"]):
             raise HTTPException(status_code=400, detail="Identifiants incorrects")
 
+        # Migration progressive vers les paramètres Argon2 calibrés
+        if needs_rehash(user["password"]):
+            try:
+                await db.execute_query(
+                    "UPDATE users SET password = %s WHERE user_id = %s",
+                    (await hash_password_async(login_data.password), user["user_id"])
+                )
+            except Exception as e:
+                print(f"⚠️ Rehash du mot de passe impossible pour {user['user_id']}: {e}")
+
         user_session = {
             "user_id": user["user_id"],
             "matricule": user["matricule"],
@@ -181,18 +312,21 @@ async def login_user(request: Request):
             "email": user["email"]
         }
 
-        cookie = create_user_cookie(user_session)
+        cookie = create_session_token(user["user_id"])
+        session_cache.put(cookie, user_session, int(time.time()) + SESSION_MAX_AGE)
 
         response = RedirectResponse(url="/dashboard", status_code=303)
         response.set_cookie(
             key="user_data",
             value=cookie,
             httponly=True,
-            max_age=86400,
+            max_age=SESSION_MAX_AGE,
             samesite="lax"
         )
         return response
 
+    except (ServiceOverloaded, PoolTimeout, RateLimited):
+        raise
     except Exception as e:
         return templates.TemplateResponse("login.html", {
             "request": request,
@@ -204,10 +338,54 @@ async def login_user(request: Request):
 async def dashboard(request: Request, current_user=Depends(get_current_user)):
     return templates.TemplateResponse("dashboard.html", {
         "request": request,
-        "user": current_user
+        "user": current_user,
+        "is_staff": is_staff(current_user)
     })
 
 
+# --------------------------------------------------------
+# Lignes de la table requests
+# --------------------------------------------------------
+REQUEST_COLUMNS = (
+    "user_id", "all_name", "matricule", "cycle", "level", "nom_code_ue",
+    "note_exam", "note_cc", "note_tp", "note_tpe", "autre", "comment", "just_p",
+)
+
+
+def request_row(current_user, req_data):
+    """Valeurs d'une requête validée, dans l'ordre de REQUEST_COLUMNS."""
+    return (
+        current_user["user_id"],
+        req_data.all_name,
+        req_data.matricule,
+        req_data.cycle,
+        req_data.level,
+        req_data.nom_code_ue,
+        req_data.note_exam, req_data.note_cc, req_data.note_tp, req_data.note_tpe,
+        req_data.autre, req_data.comment, req_data.just_p
+    )
+
+
+def build_request_rows(current_user, entries):
+    """
+    Valide toutes les entrées en une passe ; retourne (lignes, erreurs).
+    Nom et matricule viennent toujours de la session, pas du formulaire.
+    """
+    rows, errors = [], []
+    for index, entry in enumerate(entries, start=1):
+        try:
+            req_data = RequestSubmit(
+                all_name=f"{current_user['name']} {current_user['last_name']}",
+                matricule=current_user["matricule"],
+                **entry
+            )
+        except Exception as e:
+            errors.append(f"Requête {index} : {e}")
+            continue
+        rows.append(request_row(current_user, req_data))
+    return rows, errors
+
+
 @app.get("/submit-request", response_class=HTMLResponse)
 async def submit_request_form(request: Request, current_user=Depends(get_current_user)):
     return templates.TemplateResponse("submit_request.html", {
@@ -243,25 +421,16 @@ async def submit_request(request: Request, current_user=Depends(get_current_user
             just_p=just_p
         )
 
-        await db.execute_query(
-            """INSERT INTO requests (user_id, all_name, matricule, cycle, level,
-                                     nom_code_ue, note_exam, note_cc, note_tp, note_tpe,
-                                     autre, comment, just_p)
-               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-            (
-                current_user["user_id"],
-                req_data.all_name,
-                req_data.matricule,
-                req_data.cycle,
-                req_data.level,
-                req_data.nom_code_ue,
-                note_exam, note_cc, note_tp, note_tpe,
-                autre, req_data.comment, just_p
-            )
-        )
+        # Mode group commit (DB_GROUP_COMMIT) : l'INSERT peut être regroupé
+        # avec ceux des autres étudiants qui soumettent au même moment
+        await db.insert_row("requests", REQUEST_COLUMNS, request_row(current_user, req_data))
+        table_counters.increment("requests")
+        await my_requests_cache.invalidate(current_user["user_id"])
 
         return RedirectResponse(url="/my-requests", status_code=303)
 
+    except (ServiceOverloaded, PoolTimeout, RateLimited):
+        raise
     except Exception as e:
         return templates.TemplateResponse("submit_request.html", {
             "request": request,
@@ -284,30 +453,175 @@ async def submit_request(request: Request, current_user=Depends(get_current_user
 
 
 
+# --------------------------------------------------------
+# Soumission groupée : plusieurs UE, un seul INSERT multi-lignes
+# --------------------------------------------------------
+@app.get("/submit-requests", response_class=HTMLResponse)
+async def submit_requests_form(request: Request, current_user=Depends(get_current_user)):
+    return templates.TemplateResponse("submit_requests.html", {
+        "request": request,
+        "user": current_user,
+        "max_batch": MAX_BATCH_SIZE
+    })
+
+
+@app.post("/submit-requests")
+async def submit_requests(request: Request, current_user=Depends(get_current_user)):
+    """Variante formulaire : mêmes champs communs, une requête par UE saisie."""
+    form = await request.form()
+
+    try:
+        ues = [ue for ue in form.getlist("nom_code_ue") if ue and ue.strip()]
+        if not ues:
+            raise ValueError("Indiquez au moins une UE")
+        if len(ues) > MAX_BATCH_SIZE:
+            raise ValueError(f"Un lot ne peut pas dépasser {MAX_BATCH_SIZE} requêtes")
+
+        common = {
+            "cycle": form.get("cycle"),
+            "level": int(form.get("level")),
+            "note_exam": form.get("note_exam") == "on",
+            "note_cc": form.get("note_cc") == "on",
+            "note_tp": form.get("note_tp") == "on",
+            "note_tpe": form.get("note_tpe") == "on",
+            "autre": form.get("autre") == "on",
+            "comment": form.get("comment"),
+            "just_p": form.get("just_p") == "on",
+        }
+        rows, errors = build_request_rows(
+            current_user, [dict(common, nom_code_ue=ue) for ue in ues]
+        )
+        if errors:
+            raise ValueError(" ; ".join(errors))
+
+        request_ids = await db.insert_many("requests", REQUEST_COLUMNS, rows)
+        table_counters.increment("requests", len(request_ids))
+        await my_requests_cache.invalidate(current_user["user_id"])
+
+        return RedirectResponse(url="/my-requests", status_code=303)
+
+    except (ServiceOverloaded, PoolTimeout, RateLimited):
+        raise
+    except Exception as e:
+        return templates.TemplateResponse("submit_requests.html", {
+            "request": request,
+            "user": current_user,
+            "max_batch": MAX_BATCH_SIZE,
+            "error": str(e)
+        })
+
+
+@app.post("/submit-requests/json")
+async def submit_requests_json(request: Request, current_user=Depends(get_current_user)):
+    """Variante JSON : {"requests": [{cycle, level, nom_code_ue, ...}, ...]}."""
+    try:
+        batch = RequestBatchSubmit.model_validate(await request.json())
+    except Exception as e:
+        return JSONResponse({"status": "error", "errors": [str(e)]}, status_code=422)
+
+    rows, errors = build_request_rows(
+        current_user, [entry.model_dump() for entry in batch.requests]
+    )
+    if errors:
+        return JSONResponse({"status": "error", "errors": errors}, status_code=422)
+
+    request_ids = await db.insert_many("requests", REQUEST_COLUMNS, rows)
+    table_counters.increment("requests", len(request_ids))
+    await my_requests_cache.invalidate(current_user["user_id"])
+    return {"status": "success", "inserted": len(request_ids), "request_ids": request_ids}
+
+
+# --------------------------------------------------------
+# Filtres communs des vues scolarité (export, recherche)
+# --------------------------------------------------------
+def request_filters(cycle=None, level=None, date_from=None, date_to=None, notes=()):
+    """
+    Clause WHERE (sans le mot-clé) et paramètres pour les filtres fournis.
+    `date_to` est inclusif ; `notes` garde les requêtes portant sur au
+    moins un des types de note demandés.
+    """
+    clauses, params = [], []
+    if cycle:
+        clauses.append("cycle = %s")
+        params.append(cycle)
+    if level is not None:
+        clauses.append("level = %s")
+        params.append(level)
+    if date_from:
+        clauses.append("created_at >= %s")
+        params.append(date_from)
+    if date_to:
+        clauses.append("created_at < %s")
+        params.append(date_to + timedelta(days=1))
+    unknown = [note for note in notes if note not in NOTE_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Type de note inconnu : {', '.join(unknown)}")
+    if notes:
+        clauses.append("(" + " OR ".join(f"{note} = TRUE" for note in notes) + ")")
+    return " AND ".join(clauses) or "TRUE", params
+
+
 @app.get("/my-requests", response_class=HTMLResponse)
-async def my_requests(request: Request, current_user=Depends(get_current_user)):
+async def my_requests(request: Request, cursor: str | None = None, archived: bool = False,
+                      current_user=Depends(get_current_user)):
     """
-    Affiche toutes les requêtes soumises par l'utilisateur connecté.
+    Affiche les requêtes de l'utilisateur connecté, page par page.
+    Le curseur (created_at, request_id) rend chaque page aussi coûteuse,
+    quel que soit l'historique de l'étudiant (index user_id, created_at, request_id).
+    Avec ?archived=1, même pagination sur les années passées (requests_archive).
     """
     try:
+        after = decode_cursor(cursor)
+        page_key = cursor if after else None
+        if archived:
+            page_key = f"archived:{page_key or ''}"
+        generation = await my_requests_cache.generation(current_user["user_id"])
+        cached = await my_requests_cache.get_page(current_user["user_id"], page_key)
+        if cached is not None:
+            return templates.TemplateResponse("my-requests.html", {
+                "request": request,
+                "user": current_user,
+                "requests": cached["rows"],
+                "next_cursor": cached["next_cursor"],
+                "is_first_page": after is None,
+                "archived": archived
+            })
+
+        if after:
+            keyset = "AND (created_at < %s OR (created_at = %s AND request_id < %s))"
+            params = (current_user["user_id"], after[0], after[0], after[1], MY_REQUESTS_PAGE_SIZE + 1)
+        else:
+            keyset = ""
+            params = (current_user["user_id"], MY_REQUESTS_PAGE_SIZE + 1)
+
         # On récupère toutes les colonnes nécessaires, y compris 'state'
         rows = await db.fetch_all(
-            """SELECT request_id, all_name, matricule, cycle, level, nom_code_ue,
+            f"""SELECT request_id, all_name, matricule, cycle, level, nom_code_ue,
                       note_exam, note_cc, note_tp, note_tpe, autre, comment,
                       just_p, created_at, state
-               FROM requests
-               WHERE user_id = %s
-               ORDER BY created_at DESC""",
-            (current_user["user_id"],)
+               FROM {"requests_archive" if archived else "requests"}
+               WHERE user_id = %s {keyset}
+               ORDER BY created_at DESC, request_id DESC
+               LIMIT %s""",
+            params
+        )
+        rows, next_cursor = keyset_page(rows, MY_REQUESTS_PAGE_SIZE)
+        await my_requests_cache.set_page(
+            current_user["user_id"], page_key, {"rows": rows, "next_cursor": next_cursor}, generation
         )
 
         # On renvoie les données au template
         return templates.TemplateResponse("my-requests.html", {
             "request": request,
             "user": current_user,
-            "requests": rows
+            "requests": rows,
+            "next_cursor": next_cursor,
+            "is_first_page": after is None,
+            "archived": archived
         })
 
+    except (ServiceOverloaded, PoolTimeout, RateLimited):
+        raise
     except Exception as e:
         # En cas d'erreur, on loggue et on renvoie une liste vide pour éviter le crash
         print(f"❌ Erreur dans /my-requests : {e}")
@@ -315,7 +629,8 @@ async def my_requests(request: Request, current_user=Depends(get_current_user)):
             "request": request,
             "user": current_user,
             "error": str(e),
-            "requests": []
+            "requests": [],
+            "archived": archived
         })
 
 
@@ -358,12 +673,135 @@ async def my_requests(request: Request, current_user=Depends(get_current_user)):
 
 
 @app.get("/logout")
-async def logout():
+async def logout(user_data: str = Cookie(None, alias="user_data")):
+    if user_data:
+        session_cache.discard(user_data)
     response = RedirectResponse(url="/", status_code=303)
     response.delete_cookie("user_data")
     return response
 
 
+# --------------------------------------------------------
+# Export CSV pour la scolarité (flux, mémoire constante)
+# --------------------------------------------------------
+EXPORT_COLUMNS = (
+    "request_id", "matricule", "all_name", "cycle", "level", "nom_code_ue",
+    "note_exam", "note_cc", "note_tp", "note_tpe", "autre", "just_p",
+    "comment", "created_at", "state",
+)
+
+
+@app.get("/export/requests.csv", dependencies=[Depends(require_staff)])
+async def export_requests(cycle: str | None = None, level: int | None = None,
+                          date_from: date | None = None, date_to: date | None = None,
+                          note: list[str] = Query([]), archived: bool = False,
+                          gzip: bool = False):
+    """
+    Requêtes filtrées en CSV, lues par un curseur côté serveur et envoyées
+    lot par lot (transfert chunked) ; ?gzip=1 pour un fichier .csv.gz.
+    Les filtres `note` se répètent : ?note=note_exam&note=note_cc.
+    """
+    where, params = request_filters(cycle, level, date_from, date_to, note)
+    table = "requests_archive" if archived else "requests"
+    batches = await start_stream(db.stream(
+        f"""SELECT {", ".join(EXPORT_COLUMNS)}
+            FROM {table}
+            WHERE {where}
+            ORDER BY created_at, request_id""",
+        params
+    ))
+    filename = f"{table}_{date.today():%Y%m%d}.csv"
+    return csv_response(batches, EXPORT_COLUMNS, filename, compress=gzip)
+
+
+# --------------------------------------------------------
+# Statistiques (scolarité), lues dans request_stats
+# --------------------------------------------------------
+STATS_DEFAULT_DAYS = int(os.getenv("STATS_DEFAULT_DAYS", 30))
+
+
+@app.get("/stats", response_class=HTMLResponse)
+async def stats(request: Request, date_from: date | None = None, date_to: date | None = None,
+                cycle: str | None = None, level: int | None = None,
+                staff_user=Depends(require_staff)):
+    """Requêtes par cycle, niveau, type de note et jour (STATS_DEFAULT_DAYS derniers jours par défaut)."""
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=STATS_DEFAULT_DAYS - 1)
+    context = {
+        "request": request,
+        "user": staff_user,
+        "date_from": date_from,
+        "date_to": date_to,
+        "cycle": cycle or "",
+        "level": level,
+    }
+    try:
+        context.update(await stats_summary(date_from, date_to, cycle, level))
+        return templates.TemplateResponse("stats.html", context)
+
+    except (ServiceOverloaded, PoolTimeout, RateLimited):
+        raise
+    except Exception as e:
+        print(f"❌ Erreur dans /stats : {e}")
+        context.update({"error": str(e), "groups": [], "days": [], "totals": None})
+        return templates.TemplateResponse("stats.html", context)
+
+
+# --------------------------------------------------------
+# Recherche par code d'UE / texte libre (scolarité)
+# --------------------------------------------------------
+@app.get("/search", response_class=HTMLResponse)
+async def search(request: Request, q: str = "", ue: str = "", cycle: str | None = None,
+                 level: int | None = None, cursor: str | None = None,
+                 staff_user=Depends(require_staff)):
+    """
+    Requêtes citant le code d'UE `ue` (table request_ue_codes) et/ou les
+    mots de `q` (index FULLTEXT sur l'UE et le commentaire), filtrables par
+    cycle et niveau, paginées par clé.
+    """
+    context = {
+        "request": request,
+        "user": staff_user,
+        "q": q,
+        "ue": ue,
+        "cycle": cycle or "",
+        "level": level,
+        "requests": [],
+        "next_url": None,
+        "is_first_page": True,
+    }
+    codes = extract_ue_codes(ue)
+    words = search_words(q)
+    if ue.strip() and not codes:
+        context["error"] = f"Code d'UE non reconnu : {ue}"
+        return templates.TemplateResponse("search.html", context)
+    if not codes and not words:
+        return templates.TemplateResponse("search.html", context)
+
+    try:
+        after = decode_cursor(cursor)
+        where, params = request_filters(cycle, level)
+        rows = await search_requests(codes[0] if codes else None, words, where, params, after)
+        rows, next_cursor = keyset_page(rows, SEARCH_PAGE_SIZE)
+        filters = {key: value for key, value in
+                   {"q": q, "ue": ue, "cycle": cycle, "level": level}.items() if value not in (None, "")}
+        context.update({
+            "ue": codes[0] if codes else "",
+            "requests": rows,
+            "next_url": f"/search?{urlencode(dict(filters, cursor=next_cursor))}" if next_cursor else None,
+            "first_url": f"/search?{urlencode(filters)}",
+            "is_first_page": after is None,
+        })
+        return templates.TemplateResponse("search.html", context)
+
+    except (ServiceOverloaded, PoolTimeout, RateLimited):
+        raise
+    except Exception as e:
+        print(f"❌ Erreur dans /search : {e}")
+        context["error"] = str(e)
+        return templates.TemplateResponse("search.html", context)
+
+
 # --------------------------------------------------------
 # Debug
 # --------------------------------------------------------
@@ -371,32 +809,50 @@ async def logout():
 async def test_db():
     try:
         connection_test = await db.test_connection()
-        users_count = await db.fetch_one("SELECT COUNT(*) AS count FROM users")
-        requests_count = await db.fetch_one("SELECT COUNT(*) AS count FROM requests")
-        test_insert = await db.execute_query("SELECT 1 as test")
+        counts = await table_counters.get()
+        # ping plutôt qu'execute_query : pas d'épinglage au primaire (cookie db_pin)
+        await db.ping()
 
         return {
             "status": "success",
             "connection": connection_test,
-            "tables": {
-                "users": users_count["count"],
-                "requests": requests_count["count"]
-            },
-            "write_test": "ok" if test_insert is not None else "failed"
+            "tables": counts,
+            "tables_age_seconds": table_counters.age(),
+            "write_test": "ok"
         }
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
+@app.get("/auth-status")
+async def auth_status():
+    return {
+        "status": "success",
+        "limits": limiter_stats(),
+        "sessions": session_cache.stats(),
+        "unknown_logins": unknown_login_cache.stats(),
+        "argon2_executor": hash_executor.stats()
+    }
+
+
+@app.get("/cache-status")
+async def cache_status():
+    return {
+        "status": "success",
+        "my_requests": my_requests_cache.stats()
+    }
+
+
 @app.get("/debug-requests")
 async def debug_requests():
+    """Toutes les requêtes en NDJSON (une ligne par requête), mémoire bornée."""
     try:
-        all_requests = await db.fetch_all("""
+        batches = await start_stream(db.stream("""
             SELECT r.request_id, r.user_id, r.all_name, u.name, u.last_name 
             FROM requests r 
             LEFT JOIN users u ON r.user_id = u.user_id
-        """)
-        return {"status": "success", "all_requests": all_requests}
+        """))
+        return ndjson_response(batches)
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -404,35 +860,113 @@ async def debug_requests():
 @app.get("/db-status")
 async def db_status():
     try:
-        users = await db.fetch_one("SELECT COUNT(*) AS count FROM users")
-        requests = await db.fetch_one("SELECT COUNT(*) AS count FROM requests")
-        is_connected = await db.is_connected()
+        counts = await table_counters.get()
 
+        # État de la sonde de fond : un poll de monitoring ne touche pas la base
         return {
             "status": "success",
-            "connected": is_connected,
-            "users": users["count"],
-            "requests": requests["count"]
+            "connected": health_prober.is_ready(),
+            "users": counts["users"],
+            "requests": counts["requests"],
+            "counts_age_seconds": table_counters.age(),
+            "pool": db.pool_stats(),
+            "replicas": db.replica_stats(),
+            "group_commit": db.group_commit_stats(),
+            "archive": request_archiver.stats(),
+            "executors": {
+                "db": db.executor.stats(),
+                "argon2": hash_executor.stats()
+            }
         }
     except Exception as e:
         return {"status": "error", "connected": False, "message": str(e)}
 
 
+@app.post("/admin/archive", dependencies=[Depends(require_admin)])
+async def archive_requests():
+    """Archive immédiatement les requêtes des années universitaires passées."""
+    moved = await request_archiver.run_once()
+    return {"status": "success", "archived": moved, "archiver": request_archiver.stats()}
+
+
+@app.get("/admin/slow-queries", dependencies=[Depends(require_admin)])
+async def slow_queries(limit: int = 20):
+    """Formes SQL les plus coûteuses de la fenêtre glissante, avec leur EXPLAIN."""
+    return {
+        "status": "success",
+        "threshold_ms": slow_query_log.threshold * 1000,
+        "window_seconds": slow_query_log.window,
+        "queries": slow_query_log.report(limit)
+    }
+
+
+# --------------------------------------------------------
+# Métriques (format texte Prometheus)
+# --------------------------------------------------------
+def _executor_gauge(field):
+    return lambda: {
+        ("db",): db.executor.stats()[field],
+        ("argon2",): hash_executor.stats()[field],
+    }
+
+
+registry.callback_gauge("executor_running", "Tâches en cours par executor", ("executor",),
+                        _executor_gauge("running"))
+registry.callback_gauge("executor_queued", "Tâches en file d'attente par executor", ("executor",),
+                        _executor_gauge("queued"))
+registry.callback_gauge("executor_rejected", "Tâches rejetées (503) par executor depuis le démarrage", ("executor",),
+                        _executor_gauge("rejected"))
+registry.callback_gauge(
+    "db_pool_connections", "Connexions du pool MySQL par état", ("state",),
+    lambda: {(state,): (db.pool_stats() or {}).get(state) for state in ("in_use", "idle", "waiters")}
+)
+registry.callback_gauge("db_ready", "1 si la dernière sonde de la base est récente et réussie", (),
+                        lambda: {(): int(health_prober.is_ready())})
+registry.callback_gauge("db_probe_latency_seconds", "Durée de la dernière sonde réussie de la base", (),
+                        lambda: {(): (health_prober.stats()["latency_ms"] or 0) / 1000})
+registry.callback_gauge("argon2_active", "Opérations Argon2 admises en cours", (),
+                        lambda: {(): argon2_gate.stats()["active"]})
+
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+# --------------------------------------------------------
+# Santé : réponses tirées de l'état de la sonde (health.py), sans SQL
+# --------------------------------------------------------
 @app.get("/health")
 async def health_check():
-    try:
-        is_connected = await db.is_connected()
-        return {
-            "status": "healthy" if is_connected else "unhealthy",
-            "database": "connected" if is_connected else "disconnected",
-            "timestamp": __import__("datetime").datetime.now().isoformat()
-        }
-    except Exception as e:
-        return {
-            "status": "unhealthy",
-            "database": "error",
-            "error": str(e)
-        }
+    probe = health_prober.stats()
+    return {
+        "status": "healthy" if probe["ready"] else "unhealthy",
+        "database": "connected" if probe["ready"] else "disconnected",
+        "timestamp": __import__("datetime").datetime.now().isoformat(),
+        "last_success": probe["last_success"],
+        "latency_ms": probe["latency_ms"],
+        "error": probe["last_error"]
+    }
+
+
+@app.get("/health/live")
+async def liveness():
+    """Vivant : le processus répond ; ne dépend pas de la base."""
+    probe = health_prober.stats()
+    return JSONResponse(
+        {"status": "alive" if probe["live"] else "dead", "uptime_seconds": probe["uptime_seconds"]},
+        status_code=200 if probe["live"] else 503
+    )
+
+
+@app.get("/health/ready")
+async def readiness():
+    """Prêt : base joignable d'après la dernière sonde ; 503 sinon (et pendant l'arrêt)."""
+    probe = health_prober.stats()
+    return JSONResponse(
+        dict(probe, status="ready" if probe["ready"] else "not_ready"),
+        status_code=200 if probe["ready"] else 503
+    )
 
 
 if __name__ == "__main__":
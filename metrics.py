@@ -0,0 +1,259 @@
+# metrics.py - Métriques au format d'exposition Prometheus (texte), sans dépendance
+import hashlib
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def set(self, *labels, value):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    render = Counter.render
+
+
+class CallbackGauge(_Metric):
+    """Jauge lue au moment du scrape : `callback()` retourne {(labels...): valeur}."""
+    type_name = "gauge"
+
+    def __init__(self, name, documentation, labelnames, callback):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def render(self):
+        lines = self._header()
+        try:
+            values = self.callback() or {}
+        except Exception:
+            values = {}
+        for labels, value in values.items():
+            if value is not None:
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            items = [(labels, (list(s[0]), s[1], s[2])) for labels, s in self._values.items()]
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = OrderedDict()
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrique déjà enregistrée : {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def callback_gauge(self, name, documentation, labelnames, callback):
+        return self.register(CallbackGauge(name, documentation, labelnames, callback))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+# --------------------------------------------------------
+# Normalisation SQL : une étiquette par forme de requête, pas par valeur
+# --------------------------------------------------------
+_SQL_CACHE_SIZE = 512
+_sql_shapes = OrderedDict()
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*")
+_SPACES = re.compile(r"\s+")
+
+
+def sql_shape(query):
+    """Forme normalisée complète d'une requête : littéraux -> ?, listes de valeurs repliées."""
+    shape = _sql_shapes.get(query)
+    if shape is not None:
+        return shape
+    shape = _SPACES.sub(" ", query).strip()
+    shape = _STRING.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _PLACEHOLDER.sub("?", shape)
+    shape = _VALUE_LIST.sub("(...)", shape)
+    _sql_shapes[query] = shape
+    if len(_sql_shapes) > _SQL_CACHE_SIZE:
+        _sql_shapes.popitem(last=False)
+    return shape
+
+
+def shorten_shape(shape, max_length=160):
+    """
+    Forme tronquée pour l'affichage et les étiquettes ; suffixée d'une
+    empreinte de la forme complète, pour que deux requêtes au même début
+    ne se confondent pas.
+    """
+    if len(shape) <= max_length:
+        return shape
+    digest = hashlib.blake2s(shape.encode(), digest_size=4).hexdigest()
+    return f"{shape[:max_length - 13]}... #{digest}"
+
+
+def normalize_sql(query, max_length=160):
+    """Étiquette d'une requête : forme normalisée, tronquée avec empreinte."""
+    return shorten_shape(sql_shape(query), max_length)
+
+
+# --------------------------------------------------------
+# Métriques communes
+# --------------------------------------------------------
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Durée des requêtes HTTP par route", ("method", "route")
+)
+http_responses = registry.counter(
+    "http_responses_total", "Réponses HTTP par route et code de statut", ("method", "route", "status")
+)
+http_in_flight = registry.gauge(
+    "http_requests_in_flight", "Requêtes HTTP en cours de traitement"
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "Durée des requêtes SQL par forme normalisée", ("operation", "sql")
+)
+db_query_errors = registry.counter(
+    "db_query_errors_total", "Requêtes SQL en erreur par forme normalisée", ("operation", "sql")
+)
+argon2_duration = registry.histogram(
+    "argon2_duration_seconds", "Durée des opérations Argon2 (file d'attente comprise)", ("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI pur (pas de BaseHTTPMiddleware : surcoût minimal)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = {"code": 500}
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_flight.dec()
+            route = scope.get("route")
+            label = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            http_request_duration.observe(elapsed, method, label)
+            http_responses.inc(method, label, str(status["code"]))
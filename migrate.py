@@ -0,0 +1,143 @@
+# migrate.py - Migrations de schéma versionnées
+#
+# Chaque fichier migrations/NNNN_description.py définit `upgrade(cur)`.
+# La version appliquée est stockée dans `schema_version` ; au démarrage, une
+# seule requête compare cette version à la dernière migration connue.
+# Usage manuel : python migrate.py [--status]
+import glob
+import importlib.util
+import os
+import re
+
+import pymysql
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+LOCK_NAME = "requests_app_schema_migration"
+LOCK_TIMEOUT = int(os.getenv("MIGRATION_LOCK_TIMEOUT", 60))
+
+_FILENAME = re.compile(r"^(\d+)_(\w+)\.py$")
+
+
+# --------------------------------------------------------
+# Helpers pour écrire des migrations idempotentes
+# --------------------------------------------------------
+def column_exists(cur, table, column):
+    cur.execute(
+        """SELECT 1 FROM information_schema.columns
+           WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+           LIMIT 1""",
+        (table, column)
+    )
+    return cur.fetchone() is not None
+
+
+def index_exists(cur, table, index):
+    cur.execute(
+        """SELECT 1 FROM information_schema.statistics
+           WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+           LIMIT 1""",
+        (table, index)
+    )
+    return cur.fetchone() is not None
+
+
+# --------------------------------------------------------
+# Découverte et état
+# --------------------------------------------------------
+def discover(directory=MIGRATIONS_DIR):
+    """Liste triée de (version, nom, chemin)."""
+    found = []
+    for path in glob.glob(os.path.join(directory, "*.py")):
+        match = _FILENAME.match(os.path.basename(path))
+        if match:
+            found.append((int(match.group(1)), match.group(2), path))
+    found.sort()
+    versions = [v for v, _, _ in found]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError("Deux migrations portent le même numéro")
+    return found
+
+
+def _load(version, name, path):
+    spec = importlib.util.spec_from_file_location(f"migrations.m{version:04d}_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def current_version(cur):
+    """Version appliquée, ou 0 si la table schema_version n'existe pas encore."""
+    try:
+        cur.execute("SELECT MAX(version) AS version FROM schema_version")
+    except pymysql.err.ProgrammingError as e:
+        if e.args and e.args[0] == 1146:   # ER_NO_SUCH_TABLE
+            return 0
+        raise
+    row = cur.fetchone()
+    return row["version"] or 0
+
+
+# --------------------------------------------------------
+# Application
+# --------------------------------------------------------
+def migrate(conn, migrations=None):
+    """
+    Applique les migrations manquantes. Retourne (version avant, version après).
+
+    Chemin rapide : une requête si le schéma est à jour. Sinon, un verrou
+    consultatif (GET_LOCK) sérialise les workers qui démarrent ensemble ;
+    la version est relue sous verrou pour ne rien appliquer deux fois.
+    """
+    migrations = discover() if migrations is None else migrations
+    latest = migrations[-1][0] if migrations else 0
+
+    with conn.cursor() as cur:
+        before = current_version(cur)
+        if before >= latest:
+            return before, before
+
+        cur.execute("SELECT GET_LOCK(%s, %s) AS locked", (LOCK_NAME, LOCK_TIMEOUT))
+        if not cur.fetchone()["locked"]:
+            raise RuntimeError(f"Verrou de migration non obtenu après {LOCK_TIMEOUT}s")
+        try:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INT PRIMARY KEY,
+                    name VARCHAR(255) NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            version = current_version(cur)
+            for number, name, path in migrations:
+                if number <= version:
+                    continue
+                print(f"🔄 Migration {number:04d}_{name}...")
+                _load(number, name, path).upgrade(cur)
+                cur.execute(
+                    "INSERT INTO schema_version (version, name) VALUES (%s, %s)",
+                    (number, name)
+                )
+                conn.commit()
+                version = number
+            return before, version
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+
+
+if __name__ == "__main__":
+    import sys
+    from database import _connect
+
+    conn = _connect()
+    try:
+        if "--status" in sys.argv:
+            with conn.cursor() as cur:
+                applied = current_version(cur)
+            for number, name, _ in discover():
+                mark = "✅" if number <= applied else "⏳"
+                print(f"{mark} {number:04d}_{name}")
+        else:
+            before, after = migrate(conn)
+            print(f"✅ Schéma en version {after} (avant : {before})")
+    finally:
+        conn.close()
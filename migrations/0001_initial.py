@@ -0,0 +1,39 @@
+"""Tables users et requests (schéma d'origine, idempotent pour les bases existantes)."""
+
+
+def upgrade(cur):
+    # Table users
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INT AUTO_INCREMENT PRIMARY KEY,
+            matricule VARCHAR(15) UNIQUE NOT NULL,
+            name VARCHAR(255) NOT NULL,
+            last_name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) UNIQUE NOT NULL,
+            phone VARCHAR(9) NOT NULL,
+            password TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Table requests
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS requests (
+            request_id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            all_name VARCHAR(255) NOT NULL,
+            matricule VARCHAR(15) NOT NULL,
+            cycle VARCHAR(50) NOT NULL,
+            level INT NOT NULL,
+            nom_code_ue VARCHAR(2048) NOT NULL,
+            note_exam BOOLEAN DEFAULT FALSE,
+            note_cc BOOLEAN DEFAULT FALSE,
+            note_tp BOOLEAN DEFAULT FALSE,
+            note_tpe BOOLEAN DEFAULT FALSE,
+            autre BOOLEAN DEFAULT FALSE,
+            comment TEXT,
+            just_p BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+        )
+    """)
@@ -0,0 +1,7 @@
+"""Colonne requests.state (lue par /my-requests mais absente du DDL d'origine)."""
+from migrate import column_exists
+
+
+def upgrade(cur):
+    if not column_exists(cur, "requests", "state"):
+        cur.execute("ALTER TABLE requests ADD COLUMN state BOOLEAN NOT NULL DEFAULT FALSE")
@@ -0,0 +1,10 @@
+"""Index de pagination par clé de /my-requests."""
+from migrate import index_exists
+
+
+def upgrade(cur):
+    if not index_exists(cur, "requests", "idx_requests_user_created"):
+        cur.execute("""
+            CREATE INDEX idx_requests_user_created
+            ON requests (user_id, created_at, request_id)
+        """)
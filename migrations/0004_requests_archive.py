@@ -0,0 +1,33 @@
+"""Table requests_archive (requêtes des années universitaires passées, cf. archive.py)."""
+from migrate import index_exists
+
+
+def upgrade(cur):
+    # Mêmes colonnes que requests, sans auto-incrément ni clé étrangère :
+    # les lignes y arrivent avec leur request_id d'origine
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS requests_archive (
+            request_id INT PRIMARY KEY,
+            user_id INT NOT NULL,
+            all_name VARCHAR(255) NOT NULL,
+            matricule VARCHAR(15) NOT NULL,
+            cycle VARCHAR(50) NOT NULL,
+            level INT NOT NULL,
+            nom_code_ue VARCHAR(2048) NOT NULL,
+            note_exam BOOLEAN DEFAULT FALSE,
+            note_cc BOOLEAN DEFAULT FALSE,
+            note_tp BOOLEAN DEFAULT FALSE,
+            note_tpe BOOLEAN DEFAULT FALSE,
+            autre BOOLEAN DEFAULT FALSE,
+            comment TEXT,
+            just_p BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP NULL,
+            state BOOLEAN NOT NULL DEFAULT FALSE,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_requests_archive_user_created (user_id, created_at, request_id)
+        )
+    """)
+
+    # Sélection des lots à archiver par date de création
+    if not index_exists(cur, "requests", "idx_requests_created"):
+        cur.execute("CREATE INDEX idx_requests_created ON requests (created_at, request_id)")
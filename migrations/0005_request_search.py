@@ -0,0 +1,38 @@
+"""Recherche des requêtes : index FULLTEXT et table des codes d'UE (cf. search.py)."""
+from migrate import index_exists
+from models import extract_ue_codes
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade(cur):
+    if not index_exists(cur, "requests", "ft_requests_ue_comment"):
+        cur.execute("CREATE FULLTEXT INDEX ft_requests_ue_comment ON requests (nom_code_ue, comment)")
+
+    # Codes d'UE normalisés, un par ligne : la clé primaire sert la recherche
+    # par code ; supprimés avec la requête (archivage compris)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS request_ue_codes (
+            ue_code VARCHAR(16) NOT NULL,
+            request_id INT NOT NULL,
+            PRIMARY KEY (ue_code, request_id),
+            INDEX idx_request_ue_codes_request (request_id),
+            FOREIGN KEY (request_id) REFERENCES requests(request_id) ON DELETE CASCADE
+        )
+    """)
+
+    # Requêtes existantes, par lots de clé primaire
+    last_id = 0
+    while True:
+        cur.execute(
+            """SELECT request_id, nom_code_ue FROM requests
+               WHERE request_id > %s ORDER BY request_id LIMIT %s""",
+            (last_id, BACKFILL_BATCH_SIZE)
+        )
+        rows = cur.fetchall()
+        if not rows:
+            break
+        codes = [(code, row["request_id"]) for row in rows for code in extract_ue_codes(row["nom_code_ue"])]
+        if codes:
+            cur.executemany("INSERT IGNORE INTO request_ue_codes (ue_code, request_id) VALUES (%s, %s)", codes)
+        last_id = rows[-1]["request_id"]
@@ -0,0 +1,31 @@
+"""Table request_stats (compteurs par jour, cycle, niveau et type de note, cf. stats.py)."""
+
+NOTE_TYPES = ("total", "note_exam", "note_cc", "note_tp", "note_tpe", "autre")
+
+
+def upgrade(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS request_stats (
+            day DATE NOT NULL,
+            cycle VARCHAR(50) NOT NULL,
+            level INT NOT NULL,
+            note_type VARCHAR(16) NOT NULL,
+            request_count INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, cycle, level, note_type)
+        )
+    """)
+
+    # Calcul initial depuis les requêtes existantes (archivées comprises) ;
+    # ensuite, mise à jour à chaque INSERT (stats.count_request_stats)
+    cur.execute("DELETE FROM request_stats")
+    for note in NOTE_TYPES:
+        condition = "TRUE" if note == "total" else f"{note} = TRUE"
+        for table in ("requests", "requests_archive"):
+            cur.execute(f"""
+                INSERT INTO request_stats (day, cycle, level, note_type, request_count)
+                SELECT DATE(created_at), cycle, level, %s, COUNT(*)
+                FROM {table}
+                WHERE {condition}
+                GROUP BY DATE(created_at), cycle, level
+                ON DUPLICATE KEY UPDATE request_count = request_count + VALUES(request_count)
+            """, (note,))
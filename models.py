@@ -2,6 +2,24 @@ from pydantic import BaseModel, field_validator
 import re
 from typing import Optional
 
+# Formats partagés par l'inscription et la connexion (cf. classify_login)
+MATRICULE_MAX_LENGTH = 15
+MATRICULE_PATTERN = re.compile(r'^[A-Za-z0-9._-]+$')
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+# Types de note d'une requête (colonnes booléennes de requests)
+NOTE_COLUMNS = ("note_exam", "note_cc", "note_tp", "note_tpe", "autre")
+
+# Code d'UE dans le texte libre nom_code_ue : "INF 101", "mat-102a", "PHY1203"
+UE_CODE_PATTERN = re.compile(r"\b([A-Za-z]{2,5})[\s_-]?(\d{3,4}[A-Za-z]?)\b")
+
+
+def extract_ue_codes(text):
+    """Codes d'UE normalisés (majuscules, sans séparateur) cités dans `text`, sans doublon."""
+    codes = dict.fromkeys(
+        (letters + digits).upper() for letters, digits in UE_CODE_PATTERN.findall(text or "")
+    )
+    return list(codes)
+
 
 # ============================================================
 #  USER REGISTER
@@ -19,9 +37,9 @@ class UserRegister(BaseModel):
     @field_validator('matricule')
     def validate_matricule(cls, v):
         v = v.strip()
-        if len(v) > 15:
+        if len(v) > MATRICULE_MAX_LENGTH:
             raise ValueError('Le matricule ne peut pas dépasser 15 caractères')
-        if not re.match(r'^[A-Za-z0-9._-]+$', v):
+        if not MATRICULE_PATTERN.match(v):
             raise ValueError('Le matricule peut contenir uniquement lettres, chiffres, tirets, underscores et points')
         return v
 
@@ -49,7 +67,7 @@ class UserRegister(BaseModel):
         v = v.strip()
         if len(v) > 255:
             raise ValueError("L'email ne peut pas dépasser 255 caractères")
-        if not re.match(r"^[^@\s]+@[^@\s]+\.[^@\s]+$", v):
+        if not EMAIL_PATTERN.match(v):
             raise ValueError("Format d'email invalide")
         return v
 
@@ -69,6 +87,21 @@ class UserLogin(BaseModel):
         extra = "forbid"
 
 
+def classify_login(login):
+    """
+    Colonne à interroger pour un identifiant de connexion : ("email", valeur),
+    ("matricule", valeur), ou (None, valeur) si l'identifiant ne peut
+    correspondre à aucun compte (aucune requête SQL nécessaire).
+    Un matricule ne contient jamais « @ » : les deux formats sont disjoints.
+    """
+    value = (login or "").strip()
+    if "@" in value:
+        return ("email", value) if len(value) <= 255 and EMAIL_PATTERN.match(value) else (None, value)
+    if len(value) <= MATRICULE_MAX_LENGTH and MATRICULE_PATTERN.match(value):
+        return "matricule", value
+    return None, value
+
+
 
 # ============================================================
 #  REQUEST SUBMIT
@@ -135,4 +168,43 @@ class RequestSubmit(BaseModel):
         return v
 
     class Config:
-        extra = "forbid"
\ No newline at end of file
+        extra = "forbid"
+
+
+# ============================================================
+#  REQUEST BATCH (même réclamation pour plusieurs UE)
+# ============================================================
+MAX_BATCH_SIZE = 20
+
+
+class RequestBatchEntry(BaseModel):
+    cycle: str
+    level: int
+    nom_code_ue: str
+
+    note_exam: bool = False
+    note_cc: bool = False
+    note_tp: bool = False
+    note_tpe: bool = False
+    autre: bool = False
+
+    comment: Optional[str] = None
+    just_p: bool = False
+
+    class Config:
+        extra = "forbid"
+
+
+class RequestBatchSubmit(BaseModel):
+    requests: list[RequestBatchEntry]
+
+    @field_validator('requests')
+    def validate_requests(cls, v):
+        if not v:
+            raise ValueError('Le lot doit contenir au moins une requête')
+        if len(v) > MAX_BATCH_SIZE:
+            raise ValueError(f'Un lot ne peut pas dépasser {MAX_BATCH_SIZE} requêtes')
+        return v
+
+    class Config:
+        extra = "forbid"
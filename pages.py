@@ -0,0 +1,69 @@
+# pages.py - Pages statiques pré-rendues (accueil, connexion, inscription)
+import hashlib
+import os
+import tempfile
+
+from fastapi import Request, Response
+from jinja2 import FileSystemBytecodeCache
+
+# Cache persistant du bytecode Jinja : les redémarrages ne recompilent pas les templates
+JINJA_BYTECODE_CACHE_DIR = os.getenv(
+    "JINJA_BYTECODE_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "requests-app-jinja"),
+)
+
+
+def enable_bytecode_cache(templates, directory=JINJA_BYTECODE_CACHE_DIR):
+    os.makedirs(directory, exist_ok=True)
+    templates.env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+class PrerenderedPage:
+    """
+    Template sans données de requête, rendu une seule fois (au démarrage ou
+    au premier appel) puis servi tel quel en octets, avec un ETag fort.
+    `Cache-Control: no-cache` fait revalider le navigateur, qui reçoit un
+    304 sans corps tant que le template n'a pas changé (nouveau déploiement).
+    """
+
+    def __init__(self, templates, template_name, context=None):
+        self.templates = templates
+        self.template_name = template_name
+        self.context = context or {}
+        self._body = None
+        self._etag = None
+
+    def render(self):
+        if self._body is None:
+            html = self.templates.get_template(self.template_name).render(self.context)
+            body = html.encode("utf-8")
+            self._etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+            self._body = body
+        return self._body
+
+    def response(self, request: Request) -> Response:
+        body = self.render()
+        headers = {"ETag": self._etag, "Cache-Control": "no-cache"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and self._etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+
+        return Response(body, media_type="text/html", headers=headers)
+
+
+class PageRegistry:
+    def __init__(self, templates):
+        self.templates = templates
+        self._pages = {}
+
+    def page(self, template_name):
+        page = self._pages.get(template_name)
+        if page is None:
+            page = self._pages[template_name] = PrerenderedPage(self.templates, template_name)
+        return page
+
+    def warm(self, *template_names):
+        """Pré-rend les pages au démarrage."""
+        for name in template_names:
+            self.page(name).render()
@@ -0,0 +1,29 @@
+# pagination.py - Curseurs de pagination par clé (created_at, request_id)
+import base64
+from datetime import datetime
+
+
+def encode_cursor(row):
+    """Curseur opaque pointant après `row` (tri created_at DESC, request_id DESC)."""
+    raw = f"{row['created_at'].isoformat()}|{row['request_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Retourne (created_at, request_id), ou None si le curseur est absent/invalide."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, request_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(request_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(rows, page_size):
+    """Découpe `page_size + 1` lignes en (page, curseur suivant ou None)."""
+    if len(rows) > page_size:
+        page = rows[:page_size]
+        return page, encode_cursor(page[-1])
+    return rows, None
@@ -0,0 +1,221 @@
+# pool.py - Pool de connexions PyMySQL borné (thread-safe)
+import threading
+import time
+from contextlib import contextmanager
+
+import pymysql
+
+
+class PoolTimeout(Exception):
+    """Aucune connexion disponible avant l'expiration du délai d'attente."""
+
+
+class PoolClosed(Exception):
+    """Le pool a été fermé (arrêt de l'application)."""
+
+
+class ConnectionPool:
+    """
+    Pool borné de connexions bloquantes.
+
+    Les connexions sont empruntées depuis les threads de l'executor :
+    - `min_size` connexions sont ouvertes au démarrage (`fill`) ;
+    - au plus `max_size` connexions existent simultanément ;
+    - un emprunt attend au plus `timeout` secondes une connexion libre ;
+    - une connexion restée inactive plus de `ping_interval` secondes est
+      vérifiée (`ping`) avant d'être rendue à l'appelant ;
+    - une connexion plus vieille que `recycle` secondes est remplacée.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=10.0,
+                 recycle=1800.0, ping_interval=5.0):
+        if max_size < 1:
+            raise ValueError("max_size doit être >= 1")
+        self._connect = connect
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+
+        self._cond = threading.Condition()
+        self._idle = []          # pile LIFO de (conn, last_used)
+        self._created_at = {}    # id(conn) -> date de création
+        self._size = 0           # connexions ouvertes ou en cours d'ouverture
+        self._in_use = 0
+        self._waiters = 0
+        self._closed = False
+
+        # Compteurs cumulés
+        self._total_created = 0
+        self._total_recycled = 0
+        self._total_timeouts = 0
+        self._total_discarded = 0
+
+    # ----------------------------------------------------
+    # Cycle de vie des connexions
+    # ----------------------------------------------------
+    def _open(self):
+        conn = self._connect()
+        with self._cond:
+            self._created_at[id(conn)] = time.monotonic()
+            self._total_created += 1
+        return conn
+
+    def _dispose(self, conn):
+        with self._cond:
+            self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_stale(self, conn):
+        created = self._created_at.get(id(conn))
+        return created is not None and time.monotonic() - created > self.recycle
+
+    def fill(self):
+        """Ouvre les `min_size` connexions initiales."""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._open()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    # ----------------------------------------------------
+    # Emprunt / restitution
+    # ----------------------------------------------------
+    def acquire(self, timeout=None):
+        """Emprunte une connexion vivante (bloquant, à appeler hors event loop)."""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolClosed("Le pool de connexions est fermé")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._total_timeouts += 1
+                    raise PoolTimeout(
+                        f"Aucune connexion MySQL disponible après {timeout:.1f}s "
+                        f"({self._in_use}/{self.max_size} utilisées)"
+                    )
+                self._waiters += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiters -= 1
+            self._in_use += 1
+
+        try:
+            if conn is not None and self._is_stale(conn):
+                self._dispose(conn)
+                with self._cond:
+                    self._total_recycled += 1
+                conn = None
+            elif conn is not None and time.monotonic() - last_used > self.ping_interval:
+                try:
+                    conn.ping(reconnect=False)
+                except Exception:
+                    self._dispose(conn)
+                    with self._cond:
+                        self._total_discarded += 1
+                    conn = None
+            if conn is None:
+                conn = self._open()
+            return conn
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn, discard=False):
+        """Rend une connexion au pool (ou la ferme si elle est inutilisable)."""
+        with self._cond:
+            self._in_use -= 1
+            keep = not (discard or self._closed or not conn.open)
+            if keep:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._size -= 1
+                if discard:
+                    self._total_discarded += 1
+            self._cond.notify()
+        if not keep:
+            self._dispose(conn)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Emprunt scopé : rollback + éviction si la connexion est cassée."""
+        conn = self.acquire(timeout)
+        discard = False
+        try:
+            yield conn
+        except BaseException as e:
+            discard = isinstance(e, (pymysql.err.OperationalError, pymysql.err.InterfaceError))
+            if not discard:
+                try:
+                    conn.rollback()
+                except Exception:
+                    discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    # ----------------------------------------------------
+    # Arrêt et statistiques
+    # ----------------------------------------------------
+    def close(self, drain_timeout=10.0):
+        """Refuse les nouveaux emprunts, attend les connexions empruntées puis ferme tout."""
+        deadline = time.monotonic() + drain_timeout
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            while self._in_use > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn, _ in idle:
+            self._dispose(conn)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def stats(self):
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiters": self._waiters,
+                "total_created": self._total_created,
+                "total_recycled": self._total_recycled,
+                "total_discarded": self._total_discarded,
+                "total_timeouts": self._total_timeouts,
+            }
@@ -0,0 +1,166 @@
+# ratelimit.py - Contrôle d'admission du chemin Argon2 (login / register)
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+from executors import ServiceOverloaded
+
+# Tentatives autorisées par identifiant de connexion et par IP
+LOGIN_IDENTITY_RATE_PER_MIN = float(os.getenv("LOGIN_IDENTITY_RATE_PER_MIN", 5))
+LOGIN_IDENTITY_BURST = int(os.getenv("LOGIN_IDENTITY_BURST", 5))
+LOGIN_IP_RATE_PER_MIN = float(os.getenv("LOGIN_IP_RATE_PER_MIN", 30))
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", 20))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 10000))
+
+# Opérations Argon2 admises simultanément (~64 MB chacune)
+ARGON2_MAX_CONCURRENCY = int(os.getenv("ARGON2_MAX_CONCURRENCY", 4))
+# Au-delà : attente d'une place, au plus ARGON2_GATE_WAIT secondes et pour au
+# plus ARGON2_GATE_MAX_WAITERS appelants ; ensuite seulement, 503
+ARGON2_GATE_WAIT = float(os.getenv("ARGON2_GATE_WAIT", 2))
+ARGON2_GATE_MAX_WAITERS = int(os.getenv("ARGON2_GATE_MAX_WAITERS", 32))
+
+
+class RateLimited(Exception):
+    """Trop de tentatives pour cette clé ; `retry_after` en secondes."""
+
+    def __init__(self, scope, retry_after):
+        super().__init__("Trop de tentatives, réessayez dans quelques instants")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket par clé, en mémoire du processus.
+
+    Chaque clé dispose de `burst` jetons, rechargés à `rate_per_min` par
+    minute. Les clés les moins récemment vues sont évincées au-delà de
+    `max_keys` pour borner la mémoire.
+    """
+
+    def __init__(self, name, rate_per_min, burst, max_keys=RATE_LIMIT_MAX_KEYS):
+        self.name = name
+        self.rate = rate_per_min / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()   # clé -> (jetons, dernier passage)
+        self._allowed = 0
+        self._rejected = 0
+
+    def consume(self, key):
+        """Consomme un jeton ; retourne 0 si autorisé, sinon l'attente en secondes."""
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+            self._allowed += 1
+        else:
+            wait = (1 - tokens) / self.rate if self.rate > 0 else 60.0
+            self._rejected += 1
+
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def stats(self):
+        return {
+            "keys": len(self._buckets),
+            "allowed": self._allowed,
+            "rejected": self._rejected,
+        }
+
+
+class ConcurrencyGate:
+    """
+    Borne le nombre d'opérations coûteuses en cours à `limit`. Une rafale
+    attend sa place (au plus `max_wait` secondes, au plus `max_waiters`
+    appelants en file) ; `ServiceOverloaded` n'est levée qu'au-delà.
+    """
+
+    def __init__(self, name, limit, max_waiters=ARGON2_GATE_MAX_WAITERS, max_wait=ARGON2_GATE_WAIT):
+        self.name = name
+        self.limit = limit
+        self.max_waiters = max_waiters
+        self.max_wait = max_wait
+        self._slots = asyncio.Semaphore(limit)
+        self._active = 0
+        self._waiting = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._timeouts = 0
+
+    async def __aenter__(self):
+        if not self._slots.locked():
+            # Place libre : prise immédiatement, sans passer par la file
+            await self._slots.acquire()
+        elif self._waiting >= self.max_waiters:
+            self._rejected += 1
+            raise ServiceOverloaded(f"Trop d'opérations {self.name} en attente, réessayez plus tard")
+        else:
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.max_wait)
+            except asyncio.TimeoutError:
+                self._timeouts += 1
+                self._rejected += 1
+                raise ServiceOverloaded(f"Aucune place {self.name} libre après {self.max_wait:g} s, "
+                                        "réessayez plus tard") from None
+            finally:
+                self._waiting -= 1
+        self._active += 1
+        self._admitted += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._active -= 1
+        self._slots.release()
+        return False
+
+    def stats(self):
+        return {
+            "limit": self.limit,
+            "active": self._active,
+            "waiting": self._waiting,
+            "max_waiters": self.max_waiters,
+            "max_wait_seconds": self.max_wait,
+            "admitted": self._admitted,
+            "rejected": self._rejected,
+            "timeouts": self._timeouts,
+        }
+
+
+identity_limiter = TokenBucketLimiter("identity", LOGIN_IDENTITY_RATE_PER_MIN, LOGIN_IDENTITY_BURST)
+ip_limiter = TokenBucketLimiter("ip", LOGIN_IP_RATE_PER_MIN, LOGIN_IP_BURST)
+argon2_gate = ConcurrencyGate("argon2", ARGON2_MAX_CONCURRENCY)
+
+
+def client_ip(request):
+    """IP du client ; derrière le proxy Render, la dernière entrée de X-Forwarded-For."""
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded:
+        return forwarded.split(",")[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def check_auth_attempt(ip, identity=None):
+    """Lève `RateLimited` si l'IP ou l'identifiant a épuisé ses jetons."""
+    wait = ip_limiter.consume(ip)
+    if wait:
+        raise RateLimited("ip", wait)
+    if identity:
+        wait = identity_limiter.consume(identity.strip().lower())
+        if wait:
+            raise RateLimited("identity", wait)
+
+
+def limiter_stats():
+    return {
+        "ip": ip_limiter.stats(),
+        "identity": identity_limiter.stats(),
+        "argon2": argon2_gate.stats(),
+    }
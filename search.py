@@ -0,0 +1,60 @@
+# search.py - Recherche des requêtes par code d'UE et texte libre (scolarité)
+#
+# Deux chemins indexés au lieu d'un LIKE '%...%' sur toute la table :
+# - code d'UE : table request_ue_codes, alimentée dans la transaction de
+#   chaque INSERT dans requests (derived_tables.index_ue_codes) ;
+# - texte libre : index FULLTEXT sur (nom_code_ue, comment) (LIKE en SQLite).
+# Pagination par clé (created_at, request_id), comme /my-requests.
+import os
+import re
+
+from database import db
+
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", 50))
+# Mots retenus dans une recherche libre (les suivants sont ignorés)
+SEARCH_MAX_WORDS = int(os.getenv("SEARCH_MAX_WORDS", 8))
+
+SEARCH_TEXT_COLUMNS = ("nom_code_ue", "comment")
+SEARCH_RESULT_COLUMNS = (
+    "request_id", "matricule", "all_name", "cycle", "level", "nom_code_ue",
+    "note_exam", "note_cc", "note_tp", "note_tpe", "autre", "just_p",
+    "comment", "created_at", "state",
+)
+
+_WORD = re.compile(r"\w+")
+
+
+def search_words(text):
+    """Mots d'une recherche libre, sans les opérateurs du mode booléen."""
+    return _WORD.findall(text or "")[:SEARCH_MAX_WORDS]
+
+
+async def search_requests(ue_code=None, words=(), where="TRUE", params=(), after=None,
+                          page_size=SEARCH_PAGE_SIZE):
+    """
+    Requêtes citant `ue_code` et/ou contenant `words`, restreintes par
+    `where`/`params` (cf. request_filters), des plus récentes aux plus
+    anciennes ; retourne `page_size + 1` lignes au plus (cf. keyset_page).
+    """
+    joins, clauses, values = "", [f"({where})"], list(params)
+    if ue_code:
+        joins = "JOIN request_ue_codes c ON c.request_id = r.request_id"
+        clauses.append("c.ue_code = %s")
+        values.append(ue_code)
+    if words:
+        condition, match_params = db.text_match(SEARCH_TEXT_COLUMNS, words)
+        clauses.append(condition)
+        values.extend(match_params)
+    if after:
+        clauses.append("(r.created_at < %s OR (r.created_at = %s AND r.request_id < %s))")
+        values.extend((after[0], after[0], after[1]))
+    values.append(page_size + 1)
+
+    return await db.fetch_all(
+        f"""SELECT {", ".join(f"r.{column}" for column in SEARCH_RESULT_COLUMNS)}
+            FROM requests r {joins}
+            WHERE {" AND ".join(clauses)}
+            ORDER BY r.created_at DESC, r.request_id DESC
+            LIMIT %s""",
+        values
+    )
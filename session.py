@@ -0,0 +1,118 @@
+# session.py - Jetons de session compacts et cache des sessions vérifiées
+#
+# Format v1 (base64url, ~40 caractères) :
+#   version (1 octet) | user_id (4) | émis le (4) | expire le (4) | HMAC-SHA256 tronqué (16)
+# Le cookie ne porte plus le profil : l'utilisateur est relu par user_id, une
+# seule fois par jeton grâce au cache LRU.
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import os
+import struct
+import time
+from collections import OrderedDict
+
+SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key")
+SESSION_MAX_AGE = int(os.getenv("SESSION_MAX_AGE", 86400))
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", 10000))
+# Anciens cookies JSON (sans date) acceptés jusqu'à cette date, en secondes
+# epoch (déploiement du format v1 + SESSION_MAX_AGE) ; 0 = refusés
+SESSION_LEGACY_UNTIL = float(os.getenv("SESSION_LEGACY_UNTIL", 0))
+
+TOKEN_VERSION = 1
+_PAYLOAD = struct.Struct(">BIII")
+_SIGNATURE_SIZE = 16
+_KEY = SECRET_KEY.encode()
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(_KEY, payload, hashlib.sha256).digest()[:_SIGNATURE_SIZE]
+
+
+def create_session_token(user_id: int, max_age: int = SESSION_MAX_AGE) -> str:
+    now = int(time.time())
+    payload = _PAYLOAD.pack(TOKEN_VERSION, user_id, now, now + max_age)
+    return base64.urlsafe_b64encode(payload + _sign(payload)).decode().rstrip("=")
+
+
+def verify_session_token(token: str):
+    """Retourne (user_id, expire_le) si le jeton est authentique et valide, sinon None."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (ValueError, binascii.Error):
+        return None
+    if len(raw) != _PAYLOAD.size + _SIGNATURE_SIZE:
+        return None
+
+    payload, signature = raw[:_PAYLOAD.size], raw[_PAYLOAD.size:]
+    if not hmac.compare_digest(_sign(payload), signature):
+        return None
+
+    version, user_id, issued_at, expires_at = _PAYLOAD.unpack(payload)
+    if version != TOKEN_VERSION or expires_at < time.time():
+        return None
+    return user_id, expires_at
+
+
+def verify_legacy_cookie(cookie_data: str):
+    """
+    Ancien cookie « profil JSON en base64 . signature hex ». Il ne porte
+    aucune date : le serveur le refuse après SESSION_LEGACY_UNTIL, sans quoi
+    un cookie intercepté resterait valable indéfiniment.
+    """
+    if time.time() >= SESSION_LEGACY_UNTIL:
+        return None
+    try:
+        data_b64, signature = cookie_data.split(".")
+        expected = hmac.new(_KEY, data_b64.encode(), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, signature):
+            return None
+        return json.loads(base64.b64decode(data_b64).decode())
+    except Exception:
+        return None
+
+
+class SessionCache:
+    """LRU borné : jeton déjà vérifié -> (utilisateur décodé, expiration)."""
+
+    def __init__(self, max_size=SESSION_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token):
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        user, expires_at = entry
+        if expires_at < time.time():
+            del self._entries[token]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return user
+
+    def put(self, token, user, expires_at):
+        self._entries[token] = (user, expires_at)
+        self._entries.move_to_end(token)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def discard(self, token):
+        self._entries.pop(token, None)
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+session_cache = SessionCache()
@@ -0,0 +1,94 @@
+# slowlog.py - Journal des requêtes SQL lentes avec EXPLAIN automatique
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from metrics import shorten_shape
+
+# Seuil au-delà duquel une requête est journalisée (0 = désactivé)
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", 200))
+# Fenêtre glissante du classement et nombre maximal de formes suivies
+SLOW_QUERY_WINDOW = float(os.getenv("SLOW_QUERY_WINDOW", 3600))
+SLOW_QUERY_MAX_SHAPES = int(os.getenv("SLOW_QUERY_MAX_SHAPES", 200))
+
+EXPLAINABLE = ("SELECT", "UPDATE", "DELETE")
+
+
+class SlowQueryLog:
+    """
+    Agrège les requêtes lentes par forme normalisée complète (tronquée
+    seulement à l'affichage). `record` est appelé
+    depuis les threads de l'executor DB ; il indique si un EXPLAIN doit être
+    lancé (première occurrence de la forme dans la fenêtre).
+    """
+
+    def __init__(self, threshold_ms=DB_SLOW_QUERY_MS, window=SLOW_QUERY_WINDOW,
+                 max_shapes=SLOW_QUERY_MAX_SHAPES):
+        self.threshold = threshold_ms / 1000
+        self.window = window
+        self.max_shapes = max_shapes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # forme -> statistiques
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    def is_slow(self, seconds):
+        return self.enabled and seconds >= self.threshold
+
+    def record(self, shape, param_count, seconds, route):
+        """Enregistre une exécution lente ; retourne True si la forme doit être expliquée."""
+        print(f"🐢 Requête lente : {seconds * 1000:.0f} ms, {param_count} paramètre(s), "
+              f"route {route or '-'} : {shorten_shape(shape)}")
+        now = time.time()
+        with self._lock:
+            entry = self._entries.pop(shape, None)
+            if entry is None or now - entry["last_seen"] > self.window:
+                entry = {
+                    "shape": shorten_shape(shape),
+                    "param_count": param_count,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "first_seen": now,
+                    "routes": Counter(),
+                    "explain": None,
+                    "explain_requested": False,
+                }
+            entry["count"] += 1
+            entry["total_ms"] += seconds * 1000
+            entry["max_ms"] = max(entry["max_ms"], seconds * 1000)
+            entry["last_seen"] = now
+            entry["routes"][route or "-"] += 1
+            self._entries[shape] = entry
+            while len(self._entries) > self.max_shapes:
+                self._entries.popitem(last=False)
+
+            needs_explain = not entry["explain_requested"] and shape.lstrip().upper().startswith(EXPLAINABLE)
+            entry["explain_requested"] = entry["explain_requested"] or needs_explain
+            return needs_explain
+
+    def set_explain(self, shape, plan):
+        with self._lock:
+            entry = self._entries.get(shape)
+            if entry is not None:
+                entry["explain"] = plan
+
+    def report(self, limit=20):
+        """Formes les plus coûteuses (temps cumulé) de la fenêtre glissante."""
+        cutoff = time.time() - self.window
+        with self._lock:
+            entries = [dict(e, routes=dict(e["routes"].most_common(5)))
+                       for e in self._entries.values() if e["last_seen"] >= cutoff]
+        entries.sort(key=lambda e: e["total_ms"], reverse=True)
+        for entry in entries:
+            entry["avg_ms"] = round(entry["total_ms"] / entry["count"], 1)
+            entry["total_ms"] = round(entry["total_ms"], 1)
+            entry["max_ms"] = round(entry["max_ms"], 1)
+            del entry["explain_requested"]
+        return entries[:limit]
+
+
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,126 @@
+# stats.py - Statistiques des requêtes par jour, cycle, niveau et type de note
+#
+# La table request_stats est tenue à jour à chaque INSERT dans requests,
+# dans la même transaction (derived_tables.count_request_stats) : /stats
+# lit quelques centaines de lignes agrégées au lieu d'un GROUP BY sur toute
+# la table. note_type vaut "total" (toutes les requêtes) ou une colonne de
+# NOTE_COLUMNS. L'archivage ne décompte rien : les statistiques couvrent
+# toutes les requêtes, archivées comprises.
+# Recalcul complet (contrôle de cohérence) : python stats.py check|rebuild
+import argparse
+import asyncio
+
+from database import db
+from derived_tables import STATS_KEY_COLUMNS
+from models import NOTE_COLUMNS
+
+NOTE_TYPES = ("total",) + NOTE_COLUMNS
+
+
+def aggregate_query():
+    """SELECT recalculant request_stats depuis requests et requests_archive."""
+    sources = " UNION ALL ".join(
+        f"SELECT created_at, cycle, level, {', '.join(NOTE_COLUMNS)} FROM {table}"
+        for table in ("requests", "requests_archive")
+    )
+    return " UNION ALL ".join(
+        f"""SELECT DATE(created_at) AS day, cycle, level, '{note}' AS note_type, COUNT(*) AS request_count
+            FROM ({sources}) r
+            WHERE {"TRUE" if note == "total" else f"{note} = TRUE"}
+            GROUP BY DATE(created_at), cycle, level"""
+        for note in NOTE_TYPES
+    )
+
+
+async def check():
+    """Écarts entre request_stats et un recalcul complet : [(clé, stocké, recalculé)]."""
+    stored = await db.fetch_all(
+        f"SELECT {', '.join(STATS_KEY_COLUMNS)}, request_count FROM request_stats"
+    )
+    fresh = await db.fetch_all(aggregate_query())
+    stored = {tuple(str(row[c]) for c in STATS_KEY_COLUMNS): int(row["request_count"]) for row in stored}
+    fresh = {tuple(str(row[c]) for c in STATS_KEY_COLUMNS): int(row["request_count"]) for row in fresh}
+    return [(key, stored.get(key, 0), fresh.get(key, 0))
+            for key in sorted(stored.keys() | fresh.keys())
+            if stored.get(key, 0) != fresh.get(key, 0)]
+
+
+async def rebuild():
+    """Remplace request_stats par un recalcul complet, en une transaction ; retourne le nombre de lignes."""
+    _, inserted = await db.execute_transaction([
+        ("DELETE FROM request_stats", None),
+        (f"""INSERT INTO request_stats ({", ".join(STATS_KEY_COLUMNS)}, request_count)
+             {aggregate_query()}""", None),
+    ], "stats_rebuild")
+    return inserted
+
+
+async def summary(date_from, date_to, cycle=None, level=None):
+    """
+    Compteurs entre `date_from` et `date_to` (inclus) : par (cycle, niveau)
+    avec une colonne par type de note, et total par jour.
+    """
+    clauses, params = ["day BETWEEN %s AND %s"], [date_from, date_to]
+    if cycle:
+        clauses.append("cycle = %s")
+        params.append(cycle)
+    if level is not None:
+        clauses.append("level = %s")
+        params.append(level)
+    where = " AND ".join(clauses)
+
+    rows = await db.fetch_all(
+        f"""SELECT cycle, level, note_type, SUM(request_count) AS n
+            FROM request_stats
+            WHERE {where}
+            GROUP BY cycle, level, note_type
+            ORDER BY cycle, level""",
+        params
+    )
+    by_group = {}
+    for row in rows:
+        group = by_group.setdefault((row["cycle"], row["level"]), dict.fromkeys(NOTE_TYPES, 0))
+        group[row["note_type"]] = int(row["n"])
+    groups = [dict(cycle=cycle, level=level, **counts) for (cycle, level), counts in by_group.items()]
+
+    days = await db.fetch_all(
+        f"""SELECT day, SUM(request_count) AS n
+            FROM request_stats
+            WHERE {where} AND note_type = 'total'
+            GROUP BY day
+            ORDER BY day""",
+        params
+    )
+    totals = dict.fromkeys(NOTE_TYPES, 0)
+    for group in groups:
+        for note in NOTE_TYPES:
+            totals[note] += group[note]
+    return {
+        "groups": groups,
+        "days": [{"day": row["day"], "total": int(row["n"])} for row in days],
+        "totals": totals,
+    }
+
+
+async def _main(command):
+    await db.init_db()
+    try:
+        differences = await check()
+        for key, stored, fresh in differences[:20]:
+            print(f"⚠️ {' / '.join(key)} : {stored} en table, {fresh} recalculé(s)")
+        if len(differences) > 20:
+            print(f"⚠️ ... et {len(differences) - 20} autre(s) écart(s)")
+        if command == "check":
+            print("✅ Statistiques cohérentes" if not differences
+                  else f"❌ {len(differences)} compteur(s) incohérent(s)")
+        else:
+            print(f"✅ Statistiques recalculées : {await rebuild()} compteur(s)")
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Contrôle et recalcul de request_stats")
+    parser.add_argument("command", choices=("check", "rebuild"),
+                        help="check : compare au recalcul ; rebuild : remplace la table par le recalcul")
+    asyncio.run(_main(parser.parse_args().command))
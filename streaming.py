@@ -0,0 +1,106 @@
+# streaming.py - Réponses HTTP en flux (NDJSON, CSV) à partir de Database.stream
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+from fastapi.responses import StreamingResponse
+
+
+def json_default(value):
+    """Types renvoyés par PyMySQL que json ne sait pas sérialiser."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    return str(value)
+
+
+async def start_stream(batches):
+    """
+    Lit le premier lot avant d'envoyer les en-têtes : une erreur SQL lève
+    encore une exception ici (réponse d'erreur propre) au lieu de couper un
+    flux déjà commencé en 200.
+    """
+    try:
+        first = await anext(batches, None)
+    except BaseException:
+        await batches.aclose()
+        raise
+
+    async def _chained():
+        try:
+            if first is not None:
+                yield first
+                async for rows in batches:
+                    yield rows
+        finally:
+            await batches.aclose()
+
+    return _chained()
+
+
+async def ndjson_chunks(batches):
+    """Un morceau HTTP par lot, une ligne JSON par enregistrement."""
+    async for rows in batches:
+        yield "".join(
+            json.dumps(row, default=json_default, ensure_ascii=False) + "\n" for row in rows
+        ).encode()
+
+
+def ndjson_response(batches, filename=None):
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'} if filename else None
+    return StreamingResponse(ndjson_chunks(batches), media_type="application/x-ndjson", headers=headers)
+
+
+# --------------------------------------------------------
+# CSV (exports tableur)
+# --------------------------------------------------------
+# Préfixes interprétés comme formule par les tableurs (injection CSV)
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_value(value):
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+async def csv_chunks(batches, columns, compress=False):
+    """
+    Un morceau HTTP par lot : en-tête (avec BOM UTF-8 pour Excel), puis une
+    ligne par enregistrement. Avec `compress`, flux gzip vidé à chaque lot
+    (Z_SYNC_FLUSH) pour que le client reçoive les octets sans attendre la fin.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def _encode(text, final=False):
+        data = text.encode("utf-8")
+        if compressor is None:
+            return data
+        data = compressor.compress(data)
+        return data + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+    buffer.write("\ufeff")
+    writer.writerow(columns)
+    async for rows in batches:
+        for row in rows:
+            writer.writerow([_csv_value(row[column]) for column in columns])
+        yield _encode(buffer.getvalue())
+        buffer.seek(0)
+        buffer.truncate()
+    yield _encode(buffer.getvalue(), final=True)
+
+
+def csv_response(batches, columns, filename, compress=False):
+    if compress:
+        filename += ".gz"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    media_type = "application/gzip" if compress else "text/csv"
+    return StreamingResponse(csv_chunks(batches, columns, compress), media_type=media_type, headers=headers)
@@ -0,0 +1,59 @@
+# Tests de la porte de concurrence Argon2 (ratelimit.ConcurrencyGate)
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import auth
+from executors import BoundedExecutor, ServiceOverloaded
+from ratelimit import ConcurrencyGate
+
+LIMIT = 2
+CHEAP_PARAMS = {"memory_cost": 8192, "parallelism": 1, "time_cost": 1}
+
+
+@pytest.fixture
+def cheap_argon2(monkeypatch):
+    """Argon2 rapide, dans des threads, derrière une porte à LIMIT places et un seul appelant en file."""
+    context = auth.build_context(CHEAP_PARAMS)
+    executor = BoundedExecutor("argon2", lambda n: ThreadPoolExecutor(max_workers=n),
+                               max_workers=LIMIT, max_queue=8)
+    monkeypatch.setattr(auth, "pwd_context", context)
+    monkeypatch.setattr(auth, "hash_executor", executor)
+    monkeypatch.setattr(auth, "argon2_gate", ConcurrencyGate("argon2", LIMIT, max_waiters=1, max_wait=5))
+    yield context.hash("secret")
+    executor.shutdown()
+
+
+def test_extra_verify_waits_for_a_slot(cheap_argon2):
+    async def burst():
+        return await asyncio.gather(*(auth.verify_password_async("secret", cheap_argon2)
+                                      for _ in range(LIMIT + 1)))
+
+    assert asyncio.run(burst()) == [True] * (LIMIT + 1)
+    assert auth.argon2_gate.stats()["rejected"] == 0
+
+
+def test_verify_beyond_waiter_bound_is_rejected(cheap_argon2):
+    async def burst():
+        return await asyncio.gather(*(auth.verify_password_async("secret", cheap_argon2)
+                                      for _ in range(LIMIT + 2)), return_exceptions=True)
+
+    results = asyncio.run(burst())
+    assert results.count(True) == LIMIT + 1
+    assert sum(isinstance(r, ServiceOverloaded) for r in results) == 1
+
+
+def test_wait_is_bounded_in_time():
+    gate = ConcurrencyGate("test", 1, max_waiters=5, max_wait=0.05)
+
+    async def scenario():
+        async with gate:
+            with pytest.raises(ServiceOverloaded):
+                async with gate:
+                    pass
+        async with gate:        # la place libérée est de nouveau disponible
+            pass
+
+    asyncio.run(scenario())
+    assert gate.stats()["timeouts"] == 1